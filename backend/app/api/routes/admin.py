@@ -1,14 +1,51 @@
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
 
+from app.core.auth_cache import get_auth_cache
 from app.core.config import get_settings
+from app.core.database import async_session_maker, read_session_maker
+from app.core.deps import get_admin_user
+from app.core.http import pool_stats
+from app.core.profiler import ProfileSession, run_profile
+from app.models import Article, ArticleTag, User
+from app.schemas.article import ArticleImport, ArticleImportError, ArticleImportResponse
+from app.services.articles import calculate_read_time, normalize_tags
+from app.services.rag.chat_service import get_chat_service
 from app.services.rag.indexer import ContentIndexer
-from app.services.rag.vector_store import get_vector_store
+from app.services.rag.vector_store import IndexValidationError, get_vector_store
+from app.services.response_cache import invalidate_article_caches
+from app.services.snapshots import get_snapshot_publisher
 
 router = APIRouter()
 
+# Rows validated and written per transaction during import / fetched per round trip on export
+IMPORT_BATCH_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_COLUMNS = (
+    Article.slug,
+    Article.title,
+    Article.excerpt,
+    Article.content,
+    Article.category,
+    Article.tags,
+    Article.status,
+    Article.gradient,
+    Article.created_at,
+    Article.published_at,
+)
+
 
 class IndexRequest(BaseModel):
     directory: str | None = None
@@ -18,11 +55,81 @@ class IndexRequest(BaseModel):
 class IndexResponse(BaseModel):
     files: int
     chunks: int
+    # 去重时未写入的近似重复块和删除的样板行
+    duplicate_chunks: int = 0
+    boilerplate_lines: int = 0
     message: str
 
 
 class StatsResponse(BaseModel):
     total_documents: int
+    collection: str
+    previous_collection: str | None
+
+
+class HttpPoolResponse(BaseModel):
+    max_connections: int
+    max_keepalive_connections: int
+    connections: int
+    active: int
+    idle: int
+    http2: int
+    queued_requests: int
+
+
+class CacheStatsResponse(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class AuthCacheResponse(BaseModel):
+    tokens: CacheStatsResponse
+    users: CacheStatsResponse
+
+
+class SnapshotResponse(BaseModel):
+    version: str
+    files: int
+    seconds: float
+
+
+class CancellationStatsResponse(BaseModel):
+    cancelled_streams: int
+    tokens_generated: int
+    tokens_saved_upper_bound: int = Field(
+        description="Output tokens not generated, counted up to max_tokens per stream; "
+        "the real saving is lower when an answer would have ended earlier",
+    )
+
+
+class ProfileRequest(BaseModel):
+    seconds: float = Field(default=10.0, gt=0)
+    interval_ms: float = Field(default=5.0, ge=1.0, le=1000.0)
+    # 不指定时采样整个进程；指定路由模板（如 /api/articles/{slug}）时只采样匹配的请求
+    route: str | None = None
+    method: str | None = None
+    requests: int = Field(default=10, ge=1, le=1000)
+    include_idle: bool = False
+
+
+class ProfileFunctionResponse(BaseModel):
+    function: str
+    self_samples: int
+    total_samples: int
+    self_percent: float
+    total_percent: float
+
+
+class ProfileResponse(BaseModel):
+    mode: str
+    seconds: float
+    samples: int
+    requests: int
+    top: list[ProfileFunctionResponse]
+    collapsed: str
 
 
 @router.post("/index", response_model=IndexResponse)
@@ -36,18 +143,24 @@ async def index_content(request: IndexRequest) -> IndexResponse:
         raise HTTPException(status_code=400, detail=f"目录不存在: {directory}")
 
     indexer = ContentIndexer()
-    stats = indexer.index_directory(directory, request.base_url)
+    # 索引是同步的 CPU/IO 密集操作，放到线程中执行，期间其他请求照常处理
+    stats = await asyncio.to_thread(indexer.index_directory, directory, request.base_url)
 
     return IndexResponse(
         files=stats["files"],
         chunks=stats["chunks"],
-        message=f"成功索引 {stats['files']} 个文件，共 {stats['chunks']} 个文档块",
+        duplicate_chunks=stats["duplicate_chunks"],
+        boilerplate_lines=stats["boilerplate_lines"],
+        message=(
+            f"成功索引 {stats['files']} 个文件，共 {stats['chunks']} 个文档块，"
+            f"跳过 {stats['duplicate_chunks']} 个重复块"
+        ),
     )
 
 
 @router.post("/reindex", response_model=IndexResponse)
 async def reindex_content(request: IndexRequest) -> IndexResponse:
-    """重新索引所有内容（清空后重建）"""
+    """重新索引所有内容（构建新版本并校验后切换，重建期间搜索不受影响）"""
     settings = get_settings()
 
     directory = Path(request.directory) if request.directory else Path(settings.content_dir)
@@ -56,12 +169,20 @@ async def reindex_content(request: IndexRequest) -> IndexResponse:
         raise HTTPException(status_code=400, detail=f"目录不存在: {directory}")
 
     indexer = ContentIndexer()
-    stats = indexer.reindex_all(directory, request.base_url)
+    try:
+        stats = await asyncio.to_thread(indexer.reindex_all, directory, request.base_url)
+    except IndexValidationError as e:
+        raise HTTPException(status_code=422, detail=f"新索引校验失败，未切换: {e}") from e
 
     return IndexResponse(
         files=stats["files"],
         chunks=stats["chunks"],
-        message=f"重新索引完成：{stats['files']} 个文件，{stats['chunks']} 个文档块",
+        duplicate_chunks=stats["duplicate_chunks"],
+        boilerplate_lines=stats["boilerplate_lines"],
+        message=(
+            f"重新索引完成：{stats['files']} 个文件，{stats['chunks']} 个文档块，"
+            f"跳过 {stats['duplicate_chunks']} 个重复块"
+        ),
     )
 
 
@@ -69,4 +190,302 @@ async def reindex_content(request: IndexRequest) -> IndexResponse:
 async def get_stats() -> StatsResponse:
     """获取索引统计信息"""
     vector_store = get_vector_store()
-    return StatsResponse(total_documents=vector_store.count())
+    total_documents = vector_store.count()
+    return StatsResponse(
+        total_documents=total_documents,
+        collection=vector_store.state.active,
+        previous_collection=vector_store.state.previous,
+    )
+
+
+@router.post("/reindex/rollback", response_model=StatsResponse)
+async def rollback_index(
+    current_user: Annotated[User, Depends(get_admin_user)],
+) -> StatsResponse:
+    """切回上一个索引版本"""
+    vector_store = get_vector_store()
+    try:
+        vector_store.rollback()
+    except IndexValidationError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return await get_stats()
+
+
+@router.get("/http-pool", response_model=HttpPoolResponse)
+async def get_http_pool(
+    current_user: Annotated[User, Depends(get_admin_user)],
+) -> HttpPoolResponse:
+    """获取出站 HTTP 连接池使用情况"""
+    return HttpPoolResponse(**pool_stats())
+
+
+@router.get("/chat-cancellations", response_model=CancellationStatsResponse)
+async def get_chat_cancellations(
+    current_user: Annotated[User, Depends(get_admin_user)],
+) -> CancellationStatsResponse:
+    """获取被取消的 LLM 生成统计（节省的 token 按输出上限估算，是上界）"""
+    stats = get_chat_service().cancellations
+    return CancellationStatsResponse(
+        cancelled_streams=stats.count,
+        tokens_generated=stats.tokens_generated,
+        tokens_saved_upper_bound=stats.tokens_saved_upper_bound,
+    )
+
+
+@router.get("/auth-cache", response_model=AuthCacheResponse)
+async def get_auth_cache_stats(
+    current_user: Annotated[User, Depends(get_admin_user)],
+) -> AuthCacheResponse:
+    """获取认证缓存（JWT claims 和用户快照）的命中率"""
+    cache = get_auth_cache()
+    return AuthCacheResponse(
+        tokens=CacheStatsResponse(**cache.claims.stats()),
+        users=CacheStatsResponse(**cache.users.stats()),
+    )
+
+
+@router.post("/snapshots", response_model=SnapshotResponse)
+async def publish_snapshots(
+    current_user: Annotated[User, Depends(get_admin_user)],
+) -> SnapshotResponse:
+    """立即重新生成已发布文章的静态 JSON 快照"""
+    publisher = get_snapshot_publisher()
+    if publisher is None:
+        raise HTTPException(status_code=400, detail="SNAPSHOT_DIR 未配置")
+    result = await publisher.publish()
+    return SnapshotResponse(version=result.version, files=result.files, seconds=result.seconds)
+
+
+async def _ndjson_lines(stream: AsyncIterator[bytes]) -> AsyncGenerator[tuple[int, bytes], None]:
+    """按行拆分请求体，返回 (行号, 内容)，跳过空行"""
+    buffer = b""
+    number = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if line.strip():
+                yield number, line
+    if buffer.strip():
+        yield number + 1, buffer
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'line'}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def _import_batch(
+    batch: list[tuple[int, bytes]],
+    mode: str,
+    author_id: str,
+    result: ArticleImportResponse,
+) -> None:
+    """校验一批行并在一个事务中批量写入"""
+    rows: dict[str, tuple[int, ArticleImport]] = {}
+    for number, line in batch:
+        try:
+            item = ArticleImport.model_validate_json(line)
+        except ValidationError as e:
+            result.errors.append(ArticleImportError(line=number, error=_validation_message(e)))
+            continue
+        if item.slug in rows and mode == "insert":
+            result.errors.append(
+                ArticleImportError(line=number, slug=item.slug, error="Duplicate slug in import")
+            )
+            continue
+        # upsert 模式下同一批中后出现的行覆盖前面的
+        rows[item.slug] = (number, item)
+
+    if not rows:
+        return
+
+    now = datetime.now(UTC)
+    inserts: list[dict[str, object]] = []
+    updates: list[dict[str, object]] = []
+    tag_rows: list[dict[str, str]] = []
+    written: list[tuple[int, str]] = []
+    try:
+        async with async_session_maker() as db, db.begin():
+            existing = {
+                row.slug: row
+                for row in await db.execute(
+                    select(Article.slug, Article.id, Article.status).where(Article.slug.in_(rows))
+                )
+            }
+            for slug, (number, item) in rows.items():
+                if slug in existing and mode == "insert":
+                    result.errors.append(
+                        ArticleImportError(
+                            line=number, slug=slug, error="Article with this slug already exists"
+                        )
+                    )
+                    continue
+
+                current = existing.get(slug)
+                tags = normalize_tags(item.tags)
+                values: dict[str, object] = {
+                    "id": current.id if current else str(uuid.uuid4()),
+                    "slug": slug,
+                    "title": item.title,
+                    "excerpt": item.excerpt,
+                    "content": item.content,
+                    "category": item.category,
+                    "tags": json.dumps(tags),
+                    "status": item.status,
+                    "gradient": item.gradient,
+                    "read_time": calculate_read_time(item.content),
+                }
+                if item.created_at is not None:
+                    values["created_at"] = item.created_at
+                # 与 update_article 一致：更新时只有行中给出发布时间、或从草稿变为发布时才写入
+                if item.published_at is not None:
+                    values["published_at"] = item.published_at
+                elif item.status == "published" and (
+                    current is None or current.status != "published"
+                ):
+                    values["published_at"] = now
+                if current is not None:
+                    updates.append(values)
+                else:
+                    inserts.append({**values, "author_id": author_id})
+                tag_rows.extend({"article_id": values["id"], "tag": tag} for tag in tags)
+                written.append((number, slug))
+
+            if inserts:
+                await db.execute(insert(Article), inserts)
+            if updates:
+                await db.execute(update(Article), updates)
+                await db.execute(
+                    delete(ArticleTag).where(ArticleTag.article_id.in_([u["id"] for u in updates]))
+                )
+            if tag_rows:
+                await db.execute(insert(ArticleTag), tag_rows)
+            invalidate_article_caches(db)
+    except SQLAlchemyError as e:
+        # 整批回滚，批内每一行都报告为失败
+        message = str(getattr(e, "orig", None) or e)
+        result.errors.extend(
+            ArticleImportError(line=number, slug=slug, error=message) for number, slug in written
+        )
+        return
+
+    result.inserted += len(inserts)
+    result.updated += len(updates)
+
+
+@router.post("/articles/import", response_model=ArticleImportResponse)
+async def import_articles(
+    request: Request,
+    current_user: Annotated[User, Depends(get_admin_user)],
+    mode: Literal["insert", "upsert"] = "insert",
+) -> ArticleImportResponse:
+    """批量导入文章（NDJSON，每行一篇）
+
+    每 IMPORT_BATCH_SIZE 行校验一次并在一个事务中批量写入；insert 模式跳过已存在的 slug，
+    upsert 模式按 slug 更新。出错的行记录在结果中，不会中断导入。
+    """
+    result = ArticleImportResponse(inserted=0, updated=0, failed=0, errors=[])
+    batch: list[tuple[int, bytes]] = []
+    async for number, line in _ndjson_lines(request.stream()):
+        batch.append((number, line))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _import_batch(batch, mode, current_user.id, result)
+            batch = []
+    if batch:
+        await _import_batch(batch, mode, current_user.id, result)
+
+    result.errors.sort(key=lambda e: e.line)
+    result.failed = len(result.errors)
+    return result
+
+
+@router.get("/articles/export")
+async def export_articles(
+    current_user: Annotated[User, Depends(get_admin_user)],
+    status: str | None = None,
+) -> StreamingResponse:
+    """导出文章为 NDJSON，格式与导入相同（服务端游标分批读取，内存占用恒定）"""
+    query = (
+        select(*EXPORT_COLUMNS)
+        .order_by(Article.created_at, Article.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if status:
+        query = query.where(Article.status == status)
+
+    async def lines() -> AsyncGenerator[str, None]:
+        async with read_session_maker() as db:
+            result = await db.stream(query)
+            async for row in result.mappings():
+                item = ArticleImport.model_construct(
+                    **{**row, "tags": json.loads(row["tags"]) if row["tags"] else []}
+                )
+                yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="articles.ndjson"'},
+    )
+
+
+@router.post("/profile", response_model=ProfileResponse)
+async def profile(
+    request: ProfileRequest,
+    current_user: Annotated[User, Depends(get_admin_user)],
+    format: Literal["json", "collapsed"] = "json",
+) -> ProfileResponse | PlainTextResponse:
+    """采样 CPU 调用栈，在结束（超时或采满 requests 个请求）后返回结果
+
+    format=collapsed 直接返回折叠栈文件，可交给 flamegraph.pl 或 speedscope 生成火焰图。
+    """
+    settings = get_settings()
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=404, detail="采样未启用")
+    if request.seconds > settings.profiler_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"采样时长不能超过 {settings.profiler_max_seconds} 秒",
+        )
+
+    session = ProfileSession(
+        seconds=request.seconds,
+        interval=request.interval_ms / 1000,
+        route=request.route,
+        method=request.method,
+        max_requests=request.requests,
+        include_idle=request.include_idle,
+    )
+    try:
+        result = await run_profile(session)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+    if format == "collapsed":
+        return PlainTextResponse(
+            result.collapsed(),
+            headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+        )
+
+    # 每个采样周期可能包含多个线程的栈，百分比按栈样本总数计算
+    stack_samples = sum(result.stacks.values()) or 1
+    return ProfileResponse(
+        mode=result.mode,
+        seconds=result.seconds,
+        samples=result.samples,
+        requests=result.requests,
+        top=[
+            ProfileFunctionResponse(
+                function=stats.function,
+                self_samples=stats.self_samples,
+                total_samples=stats.total_samples,
+                self_percent=round(stats.self_samples * 100 / stack_samples, 2),
+                total_percent=round(stats.total_samples * 100 / stack_samples, 2),
+            )
+            for stats in result.top_functions()
+        ],
+        collapsed=result.collapsed(),
+    )
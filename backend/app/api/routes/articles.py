@@ -1,16 +1,16 @@
 import json
 import uuid
-from datetime import datetime, timezone
+from datetime import UTC, datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import and_, delete, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.deps import get_admin_user, get_current_user_optional
-from app.models import Article, User
+from app.models import Article, ArticleTag, User
 from app.schemas.article import (
     ArticleBriefResponse,
     ArticleCreate,
@@ -18,14 +18,31 @@ from app.schemas.article import (
     ArticleResponse,
     ArticleUpdate,
 )
+from app.services.articles import (
+    BRIEF_COLUMNS,
+    calculate_read_time,
+    decode_cursor,
+    encode_cursor,
+    normalize_tags,
+)
+from app.services.response_cache import (
+    PRIVATE_CACHE_CONTROL,
+    CachedResponse,
+    conditional_response,
+    get_article_cache,
+    invalidate_article_caches,
+    list_total_cache,
+    make_etag,
+    public_cache_control,
+)
 
 router = APIRouter()
 
 
-def _calculate_read_time(content: str) -> int:
-    """Calculate read time in minutes based on content length."""
-    words = len(content.split())
-    return max(1, words // 200)  # ~200 words per minute
+async def _replace_tag_rows(db: AsyncSession, article_id: str, tags: list[str]) -> None:
+    """Sync the article_tags rows used for filtering with the article's tags."""
+    await db.execute(delete(ArticleTag).where(ArticleTag.article_id == article_id))
+    db.add_all(ArticleTag(article_id=article_id, tag=tag) for tag in tags)
 
 
 # ============== Public Endpoints ==============
@@ -33,64 +50,136 @@ def _calculate_read_time(content: str) -> int:
 
 @router.get("", response_model=ArticleListResponse)
 async def list_articles(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
+    cursor: str | None = None,
+    with_total: bool = True,
     category: str | None = None,
     tag: str | None = None,
     status: str | None = None,
     current_user: Annotated[User | None, Depends(get_current_user_optional)] = None,
-) -> ArticleListResponse:
-    """List articles with pagination and filtering."""
-    query = select(Article).options(selectinload(Article.author))
-
+) -> Response:
+    """List articles with pagination and filtering.
+
+    Pass ``next_cursor`` from a previous response as ``cursor`` for keyset
+    pagination on (created_at, id); ``page`` is ignored when a cursor is given.
+    Only the columns needed for the list view are selected; the article body
+    is loaded by get_article.
+
+    Responses carry a strong ETag built from the listed ids and their
+    ``updated_at``; public responses are cached in-process until the next
+    article write or for ``ARTICLE_CACHE_TTL`` seconds.
+    """
     # Non-admin users can only see published articles
-    if not current_user or current_user.role != "admin":
-        query = query.where(Article.status == "published")
-    elif status:
-        query = query.where(Article.status == status)
+    public = not current_user or current_user.role != "admin"
+    cache = get_article_cache()
+    cache_key = cache.key_for(request)
+    generation = cache.generation
+    if public and (cached := cache.get(cache_key)):
+        return conditional_response(request, cached, public_cache_control())
+
+    filters = []
+    visible = "published" if public else status
+    if visible:
+        filters.append(Article.status == visible)
 
     if category:
-        query = query.where(Article.category == category)
+        filters.append(Article.category == category)
 
     if tag:
-        query = query.where(Article.tags.contains(f'"{tag}"'))
-
-    # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+        filters.append(Article.id.in_(select(ArticleTag.article_id).where(ArticleTag.tag == tag)))
+
+    # Count total (cached, invalidated by article writes)
+    total = None
+    if with_total:
+        count_key = json.dumps([visible, category, tag])
+        total = list_total_cache.get(count_key)
+        if total is None:
+            total_result = await db.execute(select(func.count(Article.id)).where(*filters))
+            total = total_result.scalar() or 0
+            list_total_cache.set(count_key, total)
 
     # Paginate
-    query = query.order_by(Article.created_at.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    query = (
+        select(
+            *BRIEF_COLUMNS,
+            Article.updated_at,
+            User.name.label("author_name"),
+        )
+        .join(User, Article.author_id == User.id)
+        .where(*filters)
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .limit(page_size + 1)
+    )
+    if cursor:
+        try:
+            after_created, after_id = decode_cursor(cursor)
+        except ValueError as e:
+            # the status query parameter shadows fastapi.status here
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+        query = query.where(
+            or_(
+                Article.created_at < after_created,
+                and_(Article.created_at == after_created, Article.id < after_id),
+            )
+        )
+    else:
+        query = query.offset((page - 1) * page_size)
 
     result = await db.execute(query)
-    articles = result.scalars().all()
+    rows = result.mappings().all()
 
-    return ArticleListResponse(
-        items=[ArticleResponse.model_validate(a) for a in articles],
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    body = ArticleListResponse(
+        items=[ArticleBriefResponse.model_validate(dict(row)) for row in rows],
         total=total,
         page=page,
         page_size=page_size,
+        next_cursor=next_cursor,
+    ).model_dump_json()
+    # No Last-Modified: deletions leave no updated_at behind, so only the ETag
+    # (which covers the listed ids) can validate a list
+    etag = make_etag(
+        total,
+        next_cursor,
+        [(row["id"], row["updated_at"], row["author_name"]) for row in rows],
     )
+    cached = CachedResponse(body=body.encode(), etag=etag)
+    if not public:
+        return conditional_response(request, cached, PRIVATE_CACHE_CONTROL)
+    cache.set(cache_key, cached, generation)
+    return conditional_response(request, cached, public_cache_control())
 
 
 @router.get("/{slug}", response_model=ArticleResponse)
 async def get_article(
     slug: str,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     current_user: Annotated[User | None, Depends(get_current_user_optional)] = None,
-) -> ArticleResponse:
-    """Get article by slug."""
-    query = (
-        select(Article)
-        .options(selectinload(Article.author))
-        .where(Article.slug == slug)
-    )
+) -> Response:
+    """Get article by slug.
+
+    Supports If-None-Match/If-Modified-Since; public responses are cached
+    in-process until the next article write or for ``ARTICLE_CACHE_TTL`` seconds.
+    """
+    public = not current_user or current_user.role != "admin"
+    cache = get_article_cache()
+    cache_key = cache.key_for(request)
+    generation = cache.generation
+    if public and (cached := cache.get(cache_key)):
+        return conditional_response(request, cached, public_cache_control())
+
+    query = select(Article).options(selectinload(Article.author)).where(Article.slug == slug)
 
     # Non-admin users can only see published articles
-    if not current_user or current_user.role != "admin":
+    if public:
         query = query.where(Article.status == "published")
 
     result = await db.execute(query)
@@ -102,7 +191,15 @@ async def get_article(
             detail="Article not found",
         )
 
-    return ArticleResponse.model_validate(article)
+    cached = CachedResponse(
+        body=ArticleResponse.model_validate(article).model_dump_json().encode(),
+        etag=make_etag(article.id, article.updated_at, article.author_id),
+        last_modified=article.updated_at,
+    )
+    if not public:
+        return conditional_response(request, cached, PRIVATE_CACHE_CONTROL)
+    cache.set(cache_key, cached, generation)
+    return conditional_response(request, cached, public_cache_control())
 
 
 # ============== Admin Endpoints ==============
@@ -123,6 +220,7 @@ async def create_article(
             detail="Article with this slug already exists",
         )
 
+    tags = normalize_tags(data.tags)
     article = Article(
         id=str(uuid.uuid4()),
         slug=data.slug,
@@ -130,17 +228,20 @@ async def create_article(
         excerpt=data.excerpt,
         content=data.content,
         category=data.category,
-        tags=json.dumps(data.tags),
+        tags=json.dumps(tags),
         status=data.status,
         gradient=data.gradient,
-        read_time=_calculate_read_time(data.content),
+        read_time=calculate_read_time(data.content),
         author_id=current_user.id,
-        published_at=datetime.now(timezone.utc) if data.status == "published" else None,
+        published_at=datetime.now(UTC) if data.status == "published" else None,
     )
 
     db.add(article)
     await db.flush()
+    await _replace_tag_rows(db, article.id, tags)
+    await db.flush()
     await db.refresh(article, ["author"])
+    invalidate_article_caches(db)
 
     return ArticleResponse.model_validate(article)
 
@@ -154,9 +255,7 @@ async def update_article(
 ) -> ArticleResponse:
     """Update an article (admin only)."""
     result = await db.execute(
-        select(Article)
-        .options(selectinload(Article.author))
-        .where(Article.id == article_id)
+        select(Article).options(selectinload(Article.author)).where(Article.id == article_id)
     )
     article = result.scalar_one_or_none()
 
@@ -178,21 +277,27 @@ async def update_article(
     # Update fields
     update_data = data.model_dump(exclude_unset=True)
 
-    if "tags" in update_data:
-        update_data["tags"] = json.dumps(update_data["tags"])
+    if update_data.get("tags") is not None:
+        tags = normalize_tags(update_data["tags"])
+        update_data["tags"] = json.dumps(tags)
+        await _replace_tag_rows(db, article.id, tags)
+    else:
+        update_data.pop("tags", None)
 
     if "content" in update_data:
-        update_data["read_time"] = _calculate_read_time(update_data["content"])
+        update_data["read_time"] = calculate_read_time(update_data["content"])
 
     # Handle publishing
     if data.status == "published" and article.status != "published":
-        update_data["published_at"] = datetime.now(timezone.utc)
+        update_data["published_at"] = datetime.now(UTC)
 
     for key, value in update_data.items():
         setattr(article, key, value)
 
     await db.flush()
-    await db.refresh(article, ["author"])
+    # updated_at is set by the database on update
+    await db.refresh(article, ["author", "updated_at"])
+    invalidate_article_caches(db)
 
     return ArticleResponse.model_validate(article)
 
@@ -213,4 +318,6 @@ async def delete_article(
             detail="Article not found",
         )
 
+    await db.execute(delete(ArticleTag).where(ArticleTag.article_id == article.id))
     await db.delete(article)
+    invalidate_article_caches(db)
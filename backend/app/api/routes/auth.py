@@ -2,7 +2,6 @@ import uuid
 from typing import Annotated
 from urllib.parse import urlencode
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse
 from sqlalchemy import select
@@ -10,7 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.core.database import get_db
-from app.core.deps import get_current_user
+from app.core.deps import get_current_user, invalidate_cached_user
+from app.core.http import get_http_client
 from app.core.security import create_access_token
 from app.models import User
 from app.schemas.auth import TokenResponse, TokenVerifyResponse, UserResponse
@@ -53,52 +53,52 @@ async def github_callback(
         )
 
     # Exchange code for access token
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            "https://github.com/login/oauth/access_token",
-            data={
-                "client_id": settings.github_client_id,
-                "client_secret": settings.github_client_secret,
-                "code": code,
-            },
-            headers={"Accept": "application/json"},
+    client = get_http_client()
+    token_response = await client.post(
+        "https://github.com/login/oauth/access_token",
+        data={
+            "client_id": settings.github_client_id,
+            "client_secret": settings.github_client_secret,
+            "code": code,
+        },
+        headers={"Accept": "application/json"},
+    )
+    token_data = token_response.json()
+
+    if "access_token" not in token_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to get access token from GitHub",
         )
-        token_data = token_response.json()
 
-        if "access_token" not in token_data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to get access token from GitHub",
-            )
+    access_token = token_data["access_token"]
 
-        access_token = token_data["access_token"]
+    # Get user info
+    user_response = await client.get(
+        "https://api.github.com/user",
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json",
+        },
+    )
+    github_user = user_response.json()
 
-        # Get user info
-        user_response = await client.get(
-            "https://api.github.com/user",
+    # Get user email if not public
+    email = github_user.get("email")
+    if not email:
+        emails_response = await client.get(
+            "https://api.github.com/user/emails",
             headers={
                 "Authorization": f"Bearer {access_token}",
                 "Accept": "application/json",
             },
         )
-        github_user = user_response.json()
-
-        # Get user email if not public
-        email = github_user.get("email")
-        if not email:
-            emails_response = await client.get(
-                "https://api.github.com/user/emails",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/json",
-                },
-            )
-            emails = emails_response.json()
-            primary_email = next(
-                (e for e in emails if e.get("primary") and e.get("verified")), None
-            )
-            if primary_email:
-                email = primary_email["email"]
+        emails = emails_response.json()
+        primary_email = next(
+            (e for e in emails if e.get("primary") and e.get("verified")), None
+        )
+        if primary_email:
+            email = primary_email["email"]
 
     if not email:
         raise HTTPException(
@@ -161,33 +161,33 @@ async def google_callback(
         )
 
     # Exchange code for access token
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "client_id": settings.google_client_id,
-                "client_secret": settings.google_client_secret,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": f"{settings.backend_url}/api/auth/google/callback",
-            },
-        )
-        token_data = token_response.json()
+    client = get_http_client()
+    token_response = await client.post(
+        "https://oauth2.googleapis.com/token",
+        data={
+            "client_id": settings.google_client_id,
+            "client_secret": settings.google_client_secret,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": f"{settings.backend_url}/api/auth/google/callback",
+        },
+    )
+    token_data = token_response.json()
 
-        if "access_token" not in token_data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to get access token from Google",
-            )
+    if "access_token" not in token_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to get access token from Google",
+        )
 
-        access_token = token_data["access_token"]
+    access_token = token_data["access_token"]
 
-        # Get user info
-        user_response = await client.get(
-            "https://www.googleapis.com/oauth2/v2/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        google_user = user_response.json()
+    # Get user info
+    user_response = await client.get(
+        "https://www.googleapis.com/oauth2/v2/userinfo",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    google_user = user_response.json()
 
     email = google_user.get("email")
     if not email:
@@ -258,6 +258,7 @@ async def _get_or_create_user(
         user.name = name
         user.avatar = avatar
         await db.flush()
+        invalidate_cached_user(db, user.id)
         return user
 
     # Create new user
@@ -1,22 +1,79 @@
-from fastapi import APIRouter, Depends
+from collections.abc import AsyncGenerator, AsyncIterable
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 
+from app.core.config import get_settings
+from app.core.deps import get_current_user_optional
+from app.core.metrics import CHAT_STREAMS_ACTIVE
+from app.models import User
 from app.schemas.chat import ChatRequest, ChatResponse
+from app.services.admission import AdmissionRejected, Permit, get_admission_controller
 from app.services.rag.chat_service import ChatService, get_chat_service
+from app.services.rag.failover import AllProvidersFailedError
+from app.services.sse import until_disconnected, with_heartbeat
 
 router = APIRouter()
 
 
+async def admit_chat(
+    http_request: Request,
+    current_user: Annotated[User | None, Depends(get_current_user_optional)],
+) -> AsyncGenerator[Permit, None]:
+    """准入控制：按登录用户或客户端 IP 限流，超出限制时快速返回 429/503
+
+    许可在响应发送完毕（流式响应结束或客户端断开）后释放；请求体校验失败（422）
+    或响应未开始时同样会释放。
+    """
+    if current_user is not None:
+        client = f"user:{current_user.id}"
+    else:
+        # 部署在 nginx 之后时使用其设置的 X-Real-IP
+        host = http_request.headers.get("x-real-ip")
+        if host is None and http_request.client is not None:
+            host = http_request.client.host
+        client = f"ip:{host or 'unknown'}"
+
+    try:
+        permit = await get_admission_controller().acquire(client)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
+
+    try:
+        yield permit
+    finally:
+        permit.release()
+
+
+async def _track_stream(frames: AsyncIterable[str]) -> AsyncGenerator[str, None]:
+    """统计进行中的流式响应数"""
+    CHAT_STREAMS_ACTIVE.inc()
+    try:
+        async for frame in frames:
+            yield frame
+    finally:
+        CHAT_STREAMS_ACTIVE.dec()
+
+
 @router.post("", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    chat_service: ChatService = Depends(get_chat_service),
+    chat_service: Annotated[ChatService, Depends(get_chat_service)],
+    permit: Annotated[Permit, Depends(admit_chat)],
 ) -> ChatResponse:
     """基于 RAG 的聊天接口"""
-    response, sources = await chat_service.chat(
-        message=request.message,
-        history=request.history,
-    )
+    try:
+        response, sources = await chat_service.chat(
+            message=request.message,
+            history=request.history,
+        )
+    except AllProvidersFailedError as e:
+        raise HTTPException(status_code=503, detail="AI 服务暂时不可用，请稍后重试") from e
 
     return ChatResponse(response=response, sources=sources)
 
@@ -24,10 +81,18 @@ async def chat(
 @router.post("/stream")
 async def chat_stream(
     request: ChatRequest,
-    chat_service: ChatService = Depends(get_chat_service),
+    http_request: Request,
+    chat_service: Annotated[ChatService, Depends(get_chat_service)],
+    permit: Annotated[Permit, Depends(admit_chat)],
 ) -> StreamingResponse:
-    """流式聊天接口"""
-    return StreamingResponse(
+    """流式聊天接口（客户端断开时立即取消上游生成）"""
+    settings = get_settings()
+    frames = with_heartbeat(
         chat_service.chat_stream(message=request.message, history=request.history),
+        interval=settings.sse_heartbeat_seconds,
+    )
+    return StreamingResponse(
+        _track_stream(until_disconnected(frames, http_request.receive)),
         media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
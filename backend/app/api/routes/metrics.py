@@ -0,0 +1,95 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.auth_cache import get_auth_cache
+from app.core.http import pool_stats
+from app.core.metrics import REGISTRY, Callback, Labels
+from app.services.admission import get_admission_controller
+from app.services.rag.vector_store import get_vector_store
+from app.services.response_cache import get_article_cache
+
+router = APIRouter()
+
+
+def _cache_stats() -> dict[str, dict[str, float]]:
+    auth = get_auth_cache()
+    return {
+        "article_response": get_article_cache().stats(),
+        "auth_token": auth.claims.stats(),
+        "auth_user": auth.users.stats(),
+    }
+
+
+def _cache_values(key: str) -> dict[Labels, float]:
+    return {(name,): stats[key] for name, stats in _cache_stats().items()}
+
+
+def _index_documents() -> dict[Labels, float]:
+    # 不为抓取初始化向量库（会加载嵌入模型）
+    if get_vector_store.cache_info().currsize == 0:
+        return {}
+    return {(): get_vector_store().count()}
+
+
+def _chat_admission() -> dict[Labels, float]:
+    controller = get_admission_controller()
+    return {("in_flight",): controller.in_flight, ("waiting",): controller.waiting}
+
+
+def _http_pool() -> dict[Labels, float]:
+    stats = pool_stats()
+    return {(state,): stats[state] for state in ("active", "idle", "queued_requests")}
+
+
+REGISTRY.register(
+    Callback(
+        "app_cache_hits_total",
+        "Cache hits",
+        lambda: _cache_values("hits"),
+        ("cache",),
+        type="counter",
+    )
+)
+REGISTRY.register(
+    Callback(
+        "app_cache_misses_total",
+        "Cache misses",
+        lambda: _cache_values("misses"),
+        ("cache",),
+        type="counter",
+    )
+)
+REGISTRY.register(
+    Callback(
+        "app_cache_hit_ratio",
+        "Cache hit ratio since start",
+        lambda: _cache_values("hit_rate"),
+        ("cache",),
+    )
+)
+REGISTRY.register(
+    Callback("app_cache_entries", "Cache entries", lambda: _cache_values("size"), ("cache",))
+)
+REGISTRY.register(
+    Callback("rag_index_documents", "Documents in the vector index", _index_documents)
+)
+REGISTRY.register(
+    Callback("chat_generations", "Chat generations admitted or queued", _chat_admission, ("state",))
+)
+REGISTRY.register(
+    Callback(
+        "chat_rejected_total",
+        "Chat requests rejected by admission control",
+        lambda: {(): get_admission_controller().rejected},
+        type="counter",
+    )
+)
+REGISTRY.register(
+    Callback("http_client_connections", "Outbound HTTP pool connections", _http_pool, ("state",))
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus 指标（nginx 不转发此路径，仅供内网抓取）"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
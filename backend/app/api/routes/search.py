@@ -1,6 +1,21 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated, Any
 
-from app.schemas.search import SearchRequest, SearchResponse, SearchResult
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_read_db
+from app.core.deps import get_current_user_optional
+from app.models import User
+from app.schemas.search import (
+    ArticleSearchResponse,
+    ArticleSearchResult,
+    BatchSearchRequest,
+    BatchSearchResponse,
+    SearchRequest,
+    SearchResponse,
+    SearchResult,
+)
+from app.services.fulltext import search_articles
 from app.services.rag.vector_store import VectorStore, get_vector_store
 
 router = APIRouter()
@@ -12,10 +27,28 @@ async def search(
     vector_store: VectorStore = Depends(get_vector_store),
 ) -> SearchResponse:
     """搜索站内内容"""
-    results = vector_store.search(query=request.query, limit=request.limit)
+    results = await vector_store.search_async(query=request.query, limit=request.limit)
+    return _search_response(request.query, results)
+
+
+@router.post("/batch", response_model=BatchSearchResponse)
+async def search_batch(
+    request: BatchSearchRequest,
+    vector_store: Annotated[VectorStore, Depends(get_vector_store)],
+) -> BatchSearchResponse:
+    """批量搜索：所有查询一次嵌入、一次向量查询，结果按请求顺序返回"""
+    batches = await vector_store.search_many_async([(q.query, q.limit) for q in request.queries])
+    return BatchSearchResponse(
+        responses=[
+            _search_response(q.query, results)
+            for q, results in zip(request.queries, batches, strict=True)
+        ]
+    )
+
 
+def _search_response(query: str, results: list[dict[str, Any]]) -> SearchResponse:
     return SearchResponse(
-        query=request.query,
+        query=query,
         results=[
             SearchResult(
                 title=r.get("title", ""),
@@ -26,3 +59,25 @@ async def search(
             for r in results
         ],
     )
+
+
+@router.get("/articles", response_model=ArticleSearchResponse)
+async def search_articles_fulltext(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    q: str = Query(..., min_length=1, max_length=200, description="关键词"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: Annotated[User | None, Depends(get_current_user_optional)] = None,
+) -> ArticleSearchResponse:
+    """文章关键词搜索（SQLite FTS5），结果按相关度排序并高亮命中片段"""
+    if db.bind.dialect.name != "sqlite":
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="当前数据库不支持全文检索",
+        )
+
+    published_only = not current_user or current_user.role != "admin"
+    rows = await search_articles(db, q, limit=limit, published_only=published_only)
+    return ArticleSearchResponse(
+        query=q,
+        results=[ArticleSearchResult.model_validate(row) for row in rows],
+    )
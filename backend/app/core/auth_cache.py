@@ -0,0 +1,92 @@
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from app.core.config import get_settings
+
+
+class TTLCache[K, V]:
+    """有界 TTL 缓存：过期的条目在读取时丢弃，超出容量时淘汰最久未使用的"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class AuthCache:
+    """认证缓存：token -> JWT claims，user id -> 用户列快照
+
+    用户行被修改时需要调用 invalidate_user；其他 worker 中的快照最多在 TTL 后过期。
+    """
+
+    def __init__(self, max_size: int, token_ttl: float, user_ttl: float):
+        self.claims: TTLCache[str, dict[str, Any]] = TTLCache(max_size, token_ttl)
+        self.users: TTLCache[str, dict[str, Any]] = TTLCache(max_size, user_ttl)
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        # 不在内存中保留原始 token
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get_claims(self, token: str) -> dict[str, Any] | None:
+        return self.claims.get(self._token_key(token))
+
+    def set_claims(self, token: str, claims: dict[str, Any]) -> None:
+        # 不能缓存到 token 过期之后
+        exp = claims.get("exp")
+        ttl = exp - time.time() if isinstance(exp, int | float) else None
+        self.claims.set(self._token_key(token), claims, ttl)
+
+    def invalidate_user(self, user_id: str) -> None:
+        self.users.pop(user_id)
+
+
+@lru_cache
+def get_auth_cache() -> AuthCache:
+    settings = get_settings()
+    return AuthCache(
+        max_size=settings.auth_cache_size,
+        token_ttl=settings.auth_token_cache_ttl,
+        user_ttl=settings.auth_user_cache_ttl,
+    )
@@ -1,6 +1,8 @@
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -20,6 +22,9 @@ class Settings(BaseSettings):
 
     # Vector Store
     chroma_persist_dir: str = "./data/chroma"
+    # Workers sharing chroma_persist_dir reload their in-memory index at most this
+    # often (seconds) after another worker bumped the index version
+    vector_store_reload_interval: float = 1.0
 
     # Embedding Settings
     embedding_provider: str = "gemini"  # gemini or local
@@ -31,21 +36,122 @@ class Settings(BaseSettings):
     openai_base_url: str | None = None
     openai_model: str = "gpt-4o-mini"
     anthropic_api_key: str = ""
+    anthropic_base_url: str | None = None
     anthropic_model: str = "claude-3-5-sonnet-20241022"
     gemini_api_key: str = ""
     gemini_model: str = "gemini-2.0-flash-exp"
 
+    # LLM failover: ordered "provider" or "provider:model" entries (defaults to llm_provider).
+    # A backup request starts when no first token arrives within llm_hedge_delay_ms (0 = off);
+    # a provider is skipped for llm_breaker_reset_seconds after llm_breaker_failures errors,
+    # then a single probe request decides whether it is used again.
+    llm_providers: list[str] = []
+    llm_hedge_delay_ms: int = 2000
+    llm_breaker_failures: int = 3
+    llm_breaker_reset_seconds: float = 30.0
+
+    # Request coalescing: identical concurrent chat/search requests share one execution
+    request_coalescing: bool = True
+
+    # Chat admission control: global in-flight generations with a bounded wait queue,
+    # per-user/IP concurrency and token-bucket rate limits (0 rate disables the bucket)
+    chat_max_in_flight: int = 32
+    chat_max_queue: int = 64
+    chat_queue_timeout: float = 10.0
+    chat_per_client_concurrency: int = 2
+    chat_rate_per_minute: float = 20.0
+    chat_rate_burst: int = 5
+
+    # Chat history: recent turns kept verbatim within this token budget,
+    # older turns are folded into a cached rolling summary
+    history_max_tokens: int = 2000
+    history_summary_cache_size: int = 1024
+
+    # SSE streaming: deltas are coalesced into one frame per window or size,
+    # idle streams get a heartbeat comment so proxies keep them open
+    sse_coalesce_ms: int = 20
+    sse_coalesce_bytes: int = 512
+    sse_heartbeat_seconds: float = 15.0
+
+    # Outbound HTTP (shared client for LLM SDKs and OAuth)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 60.0
+    http2: bool = True
+
+    # Public article responses: anonymous bodies are cached in-process until the next
+    # article write in this worker, and for at most article_cache_ttl seconds (writes in
+    # other workers are only seen after that); clients revalidate with
+    # ETag/Last-Modified after max-age seconds. With database_read_url set, the cache is
+    # not refilled for article_cache_replica_lag seconds after a write.
+    article_cache_size: int = 512
+    article_cache_ttl: float = 30.0
+    article_cache_replica_lag: float = 5.0
+    article_cache_max_age: int = 0
+
+    # Static JSON snapshots of published articles, served by nginx with try_files
+    # and regenerated after each article write (empty = disabled)
+    snapshot_dir: str = ""
+    snapshot_page_size: int = 10
+    snapshot_keep_versions: int = 2
+
+    # Prometheus metrics at /metrics (request, RAG stage and LLM latency histograms)
+    metrics_enabled: bool = True
+
+    # On-demand sampling profiler under /api/admin/profile (admins only)
+    profiler_enabled: bool = True
+    profiler_max_seconds: float = 60.0
+
     # Content paths
     content_dir: str = "./content"
+    # HTML text extraction for indexing: "soup" (BeautifulSoup tree) or "lxml"
+    # (streaming parser target, same output without building a tree)
+    html_extractor: Literal["soup", "lxml"] = "soup"
+    # Corpus-wide dedup when indexing a directory: lines found on at least this share of
+    # pages are dropped as boilerplate, and chunks within this SimHash distance (of 64
+    # bits) of an already indexed chunk are embedded only once. Off by default: a
+    # dropped chunk's page is then only reachable through the first page's URL
+    index_dedup: bool = False
+    index_boilerplate_ratio: float = 0.5
+    index_near_duplicate_distance: int = Field(3, ge=0, le=63)
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./data/app.db"
+    # Optional read-only engine for GET endpoints (a replica, or for SQLite the same
+    # file opened with "?mode=ro&uri=true"); defaults to database_url
+    database_read_url: str | None = None
+    # Connection pool (server databases such as postgresql+asyncpg)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # SQLite pragmas applied on every new connection
+    sqlite_wal: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    # Query instrumentation: statements slower than this are logged (0 = off); a request
+    # issuing more than db_query_budget statements, or the same statement more than
+    # db_repeated_query_limit times (N+1), is logged or raises QueryBudgetExceeded
+    db_slow_query_ms: float = 200.0
+    db_query_budget: int = 30
+    db_repeated_query_limit: int = 10
+    db_query_budget_action: Literal["warn", "raise"] = "warn"
 
     # JWT
     secret_key: str = "your-secret-key-change-in-production"
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 60 * 24 * 7  # 7 days
 
+    # Auth caches: decoded JWT claims and user snapshots, so most authenticated
+    # requests skip the users query; user writes invalidate the snapshot
+    auth_cache_size: int = 10000
+    auth_token_cache_ttl: float = 300.0
+    auth_user_cache_ttl: float = 60.0
+
     # OAuth - GitHub
     github_client_id: str = ""
     github_client_secret: str = ""
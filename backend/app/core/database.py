@@ -1,15 +1,87 @@
+import json
 from collections.abc import AsyncGenerator
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import (
+    Connection,
+    String,
+    event,
+    exists,
+    func,
+    insert,
+    make_url,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import get_settings
+from app.core.query_stats import instrument_engine
+from app.services.fulltext import ensure_fulltext_index
 
 settings = get_settings()
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
+
+def _set_sqlite_pragmas(dbapi_connection: Any, read_only: bool) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if settings.sqlite_wal and not read_only:
+            # WAL lets readers run alongside the writer; the mode persists in the file
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """Create an engine using the profile for its backend.
+
+    SQLite connections get WAL, busy_timeout, synchronous and mmap pragmas;
+    server databases (e.g. postgresql+asyncpg) get a sized, pre-pinged pool.
+    Both get the query instrumentation hooks from app.core.query_stats.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        sqlite_engine = create_async_engine(url, echo=settings.debug)
+
+        @event.listens_for(sqlite_engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+            _set_sqlite_pragmas(dbapi_connection, read_only)
+
+        instrument_engine(sqlite_engine.sync_engine)
+        return sqlite_engine
+
+    server_engine = create_async_engine(
+        url,
+        echo=settings.debug,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    instrument_engine(server_engine.sync_engine)
+    return server_engine
+
+
+engine = create_db_engine(settings.database_url)
+
+# GET endpoints read through this engine; without DATABASE_READ_URL it is the primary
+read_engine = (
+    create_db_engine(settings.database_read_url, read_only=True)
+    if settings.database_read_url
+    else engine
 )
 
 async_session_maker = async_sessionmaker(
@@ -18,6 +90,16 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Reads run in autocommit mode: no BEGIN/COMMIT round trips, and on SQLite no
+# transaction that could be upgraded to a write lock. The isolation level is
+# reset when connections return to the shared pool.
+read_session_maker = async_sessionmaker(
+    read_engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
 
 class Base(DeclarativeBase):
     pass
@@ -33,6 +115,75 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session on the read engine for GET endpoints.
+
+    Statements run in autocommit mode and the session never commits, so
+    queries in one request do not share a snapshot. Never write through it.
+    """
+    async with read_session_maker() as session:
+        yield session
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    """create_all only indexes new tables; add indexes declared since then."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+async def _backfill_article_tags(conn: AsyncConnection) -> None:
+    """Copy JSON tags of articles without ArticleTag rows into article_tags."""
+    from app.models import Article, ArticleTag
+
+    result = await conn.execute(
+        select(Article.id, Article.tags).where(
+            Article.tags.not_in(["", "[]"]),
+            ~exists().where(ArticleTag.article_id == Article.id),
+        )
+    )
+    rows = []
+    for article_id, raw_tags in result:
+        try:
+            tags = json.loads(raw_tags)
+        except json.JSONDecodeError:
+            continue
+        unique_tags = dict.fromkeys(t.strip() for t in tags if isinstance(t, str) and t.strip())
+        rows.extend({"article_id": article_id, "tag": tag} for tag in unique_tags)
+    if rows:
+        await conn.execute(insert(ArticleTag), rows)
+
+
+async def _normalize_sqlite_timestamps(conn: AsyncConnection) -> None:
+    """Rewrite CURRENT_TIMESTAMP values ("YYYY-MM-DD HH:MM:SS") of articles.created_at
+    in the format SQLAlchemy binds datetimes with on SQLite (with microseconds).
+
+    SQLite compares datetimes as text, so keyset cursors only match rows stored in
+    the bound format.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    from app.models import Article
+
+    stored = type_coerce(Article.created_at, String)
+    await conn.execute(
+        update(Article)
+        .where(func.length(stored) == 19)
+        .values(created_at=stored.concat(".000000"))
+        .execution_options(synchronize_session=False)
+    )
+
+
 async def init_db() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
+        await _backfill_article_tags(conn)
+        await _normalize_sqlite_timestamps(conn)
+        await ensure_fulltext_index(conn)
+
+
+async def close_db() -> None:
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -1,20 +1,67 @@
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
-from app.core.database import get_db
+from app.core.auth_cache import get_auth_cache
+from app.core.database import get_read_db
 from app.core.security import decode_access_token
 from app.models import User
 
 security = HTTPBearer(auto_error=False)
 
 
+def _decode_token(token: str) -> dict[str, Any] | None:
+    """Decode a JWT, reusing cached claims for tokens seen before."""
+    cache = get_auth_cache()
+    payload = cache.get_claims(token)
+    if payload is None:
+        payload = decode_access_token(token)
+        if payload is not None:
+            cache.set_claims(token, payload)
+    return payload
+
+
+async def _load_user(db: AsyncSession, user_id: str) -> User | None:
+    """Load a user, from a cached snapshot when possible.
+
+    Each call returns its own detached instance, so requests never share
+    mutable ORM state.
+    """
+    cache = get_auth_cache()
+    snapshot = cache.users.get(user_id)
+    if snapshot is None:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
+        snapshot = {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+        cache.users.set(user_id, snapshot)
+        return user
+
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+def invalidate_cached_user(db: AsyncSession, user_id: str) -> None:
+    """Drop the cached user now and again once the session commits."""
+    cache = get_auth_cache()
+    cache.invalidate_user(user_id)
+    event.listen(
+        db.sync_session,
+        "after_commit",
+        lambda _session: cache.invalidate_user(user_id),
+        once=True,
+    )
+
+
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ) -> User:
     """Get current authenticated user."""
     if credentials is None:
@@ -25,7 +72,7 @@ async def get_current_user(
         )
 
     token = credentials.credentials
-    payload = decode_access_token(token)
+    payload = _decode_token(token)
 
     if payload is None:
         raise HTTPException(
@@ -41,8 +88,7 @@ async def get_current_user(
             detail="Invalid token payload",
         )
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await _load_user(db, user_id)
 
     if user is None:
         raise HTTPException(
@@ -55,7 +101,7 @@ async def get_current_user(
 
 async def get_current_user_optional(
     credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ) -> User | None:
     """Get current user if authenticated, otherwise None."""
     if credentials is None:
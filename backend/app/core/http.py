@@ -0,0 +1,80 @@
+from importlib.util import find_spec
+from typing import Any
+
+import httpx
+
+from app.core.config import get_settings
+
+_client: httpx.AsyncClient | None = None
+
+
+def http_timeout() -> httpx.Timeout:
+    """出站请求的超时设置"""
+    settings = get_settings()
+    return httpx.Timeout(
+        settings.http_read_timeout,
+        connect=settings.http_connect_timeout,
+    )
+
+
+def _create_client() -> httpx.AsyncClient:
+    settings = get_settings()
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=http_timeout(),
+        # HTTP/2 需要安装 h2
+        http2=settings.http2 and find_spec("h2") is not None,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """应用共享的 HTTP 客户端（连接池复用 TCP/TLS 连接）"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def init_http_client() -> None:
+    get_http_client()
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def pool_stats() -> dict[str, Any]:
+    """连接池使用情况"""
+    settings = get_settings()
+    stats: dict[str, Any] = {
+        "max_connections": settings.http_max_connections,
+        "max_keepalive_connections": settings.http_max_keepalive_connections,
+        "connections": 0,
+        "active": 0,
+        "idle": 0,
+        "http2": 0,
+        "queued_requests": 0,
+    }
+    if _client is None or _client.is_closed:
+        return stats
+
+    # httpcore 的连接池没有公开的统计接口，这里读取其内部状态
+    pool = getattr(_client._transport, "_pool", None)
+    connections = getattr(pool, "connections", [])
+    stats["connections"] = len(connections)
+    for connection in connections:
+        if connection.is_idle():
+            stats["idle"] += 1
+        else:
+            stats["active"] += 1
+        if "HTTP/2" in repr(connection):
+            stats["http2"] += 1
+    stats["queued_requests"] = sum(1 for r in getattr(pool, "_requests", []) if r.is_queued())
+    return stats
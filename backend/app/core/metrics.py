@@ -0,0 +1,238 @@
+import bisect
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # 计时也会发生在 to_thread 的工作线程中
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每个标签组合：[各桶计数..., 超出最大桶的计数, 总和]
+        self._series: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series, strict=False):
+                cumulative += int(count)
+                label_text = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            cumulative += int(series[len(self.buckets)])
+            label_text = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Callback(_Metric):
+    """抓取时才计算的指标，fn 返回 {标签值: 数值}"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        fn: Callable[[], dict[Labels, float]],
+        labelnames: Sequence[str] = (),
+        type: str = "gauge",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+        self.type = type
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, value in sorted(self.fn().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register[M: _Metric](self, metric: M) -> M:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logger.exception("指标采集失败: %s", metric.name)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template (streams until the last byte)",
+        ("method", "route", "status"),
+    )
+)
+RAG_STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "rag_stage_duration_seconds",
+        "Latency of RAG pipeline stages",
+        ("stage",),
+    )
+)
+LLM_TTFT_SECONDS = REGISTRY.register(
+    Histogram(
+        "llm_time_to_first_token_seconds",
+        "Time from starting an LLM request to its first streamed token",
+        ("backend",),
+    )
+)
+LLM_GENERATION_SECONDS = REGISTRY.register(
+    Histogram(
+        "llm_generation_duration_seconds",
+        "Total LLM generation time by outcome (ok, error, cancelled)",
+        ("backend", "outcome"),
+    )
+)
+CHAT_STREAMS_ACTIVE = REGISTRY.register(
+    Gauge("chat_streams_active", "Chat SSE streams currently being sent")
+)
+
+
+class MetricsMiddleware:
+    """记录每个路由的请求耗时（纯 ASGI，不缓冲流式响应）"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, scope["method"], route_template(scope), str(status)
+            )
+
+
+def route_template(scope: Scope) -> str:
+    """使用路由模板而不是原始路径，避免标签基数过高"""
+    # 新版 FastAPI 中 scope["route"] 是 include_router 之前的路由，路径不含前缀
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(context, "path", None)
+    if path is None:
+        path = getattr(scope.get("route"), "path", None)
+    return path if path is not None else "unmatched"
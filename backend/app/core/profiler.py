@@ -0,0 +1,266 @@
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from types import FrameType
+
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# 单个调用栈最多记录的帧数
+MAX_STACK_DEPTH = 128
+
+_CWD = os.getcwd() + os.sep
+
+# 叶子帧是这些函数时视为线程空闲（等待锁、队列或 I/O）
+_IDLE_FUNCTIONS = {
+    ("threading.py", "Condition.wait"),
+    ("threading.py", "Event.wait"),
+    ("queue.py", "Queue.get"),
+    ("thread.py", "_worker"),
+    ("selectors.py", "EpollSelector.select"),
+    ("selectors.py", "KqueueSelector.select"),
+    ("selectors.py", "PollSelector.select"),
+    ("selectors.py", "SelectSelector.select"),
+}
+
+
+@dataclass
+class FunctionStats:
+    function: str
+    self_samples: int
+    total_samples: int
+
+
+@dataclass
+class ProfileResult:
+    mode: str
+    seconds: float
+    samples: int
+    requests: int
+    stacks: Counter[tuple[str, ...]]
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope 可直接读取的折叠栈格式"""
+        lines = [";".join(stack) + f" {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def top_functions(self, limit: int = 30) -> list[FunctionStats]:
+        self_counts: Counter[str] = Counter()
+        total_counts: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            # 第一个元素是线程名，不计入函数统计
+            frames = stack[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        return [
+            FunctionStats(function=name, self_samples=self_counts[name], total_samples=total)
+            for name, total in sorted(
+                total_counts.items(), key=lambda item: (-self_counts[item[0]], -item[1])
+            )[:limit]
+        ]
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    # 缩短火焰图标签：第三方库保留 site-packages 之后的路径，项目代码使用相对路径
+    filename = code.co_filename
+    _, sep, tail = filename.rpartition("site-packages" + os.sep)
+    if sep:
+        filename = tail
+    elif filename.startswith(_CWD):
+        filename = filename[len(_CWD) :]
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_qualname) in _IDLE_FUNCTIONS
+
+
+class ProfileSession:
+    """采样式 profiler：后台线程按固定间隔读取 sys._current_frames()
+
+    不指定 route 时采样整个进程的所有线程；指定 route（路由模板，如 /api/chat/stream）时
+    只采样接下来 max_requests 个匹配请求：事件循环线程上仅记录调用链经过这些请求的栈，
+    其他线程（to_thread / 线程池）在匹配请求进行期间全部记录。
+    默认跳过空闲线程（叶子帧在等待锁、队列或 select）。
+    """
+
+    def __init__(
+        self,
+        seconds: float,
+        interval: float,
+        route: str | None = None,
+        method: str | None = None,
+        max_requests: int = 10,
+        include_idle: bool = False,
+    ):
+        self.seconds = seconds
+        self.interval = interval
+        self.mode = "process" if route is None else "route"
+        self.method = method.upper() if method else None
+        self.max_requests = max_requests
+        self.include_idle = include_idle
+        self._route_regex: re.Pattern[str] | None = None
+        if route is not None:
+            self._route_regex = compile_path(route)[0]
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._done = asyncio.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._switch_interval = sys.getswitchinterval()
+        self._lock = threading.Lock()
+        # 正在处理的匹配请求：中间件协程帧（出现在该请求的调用链上）
+        self._request_frames: set[FrameType] = set()
+        self._claimed = 0
+        self._finished = 0
+        self._stacks: Counter[tuple[str, ...]] = Counter()
+        self._samples = 0
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    def start(self) -> None:
+        # 采样线程需要拿到 GIL 才能读取其他线程的栈；缩短切换间隔，
+        # 否则只能在事件循环阻塞于 select 时采到样本
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+        self._loop.call_later(self.seconds, self.stop)
+
+    async def wait(self) -> ProfileResult:
+        await self._done.wait()
+        return self.result()
+
+    def result(self) -> ProfileResult:
+        with self._lock:
+            stacks = Counter(self._stacks)
+        return ProfileResult(
+            mode=self.mode,
+            seconds=self._elapsed,
+            samples=self._samples,
+            requests=self._finished,
+            stacks=stacks,
+        )
+
+    def stop(self) -> None:
+        if self._done.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            sys.setswitchinterval(self._switch_interval)
+        self._elapsed = time.perf_counter() - self._started
+        self._done.set()
+
+    # --- 请求范围 ---
+
+    def claim(self, scope: Scope) -> bool:
+        """匹配且名额未用完时占用一个请求名额"""
+        if self._route_regex is None or self._done.is_set():
+            return False
+        if self.method is not None and scope["method"] != self.method:
+            return False
+        if not self._route_regex.match(scope["path"]):
+            return False
+        if self._claimed >= self.max_requests:
+            return False
+        self._claimed += 1
+        return True
+
+    def enter(self, frame: FrameType) -> None:
+        with self._lock:
+            self._request_frames.add(frame)
+
+    def exit(self, frame: FrameType) -> None:
+        with self._lock:
+            self._request_frames.discard(frame)
+        self._finished += 1
+        if self._finished >= self.max_requests:
+            self.stop()
+
+    # --- 采样线程 ---
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                request_frames = set(self._request_frames)
+            if self.mode == "route" and not request_frames:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (not self.include_idle and _is_idle(frame)):
+                    continue
+                required = None
+                if self.mode == "route" and thread_id == self._loop_thread:
+                    required = request_frames
+                stack = _walk(frame, required)
+                if stack is None:
+                    continue
+                with self._lock:
+                    self._stacks[(names.get(thread_id, str(thread_id)), *stack)] += 1
+            self._samples += 1
+
+
+def _walk(frame: FrameType | None, required: set[FrameType] | None) -> list[str] | None:
+    """从根到叶的帧标签；指定 required 时栈上必须包含其中之一，否则返回 None"""
+    labels = []
+    matched = required is None
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        if not matched and frame in required:
+            matched = True
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    if not matched:
+        return None
+    labels.reverse()
+    return labels
+
+
+_active: ProfileSession | None = None
+
+
+async def run_profile(session: ProfileSession) -> ProfileResult:
+    """运行一次采样，同一时间只允许一个会话"""
+    global _active
+    if _active is not None:
+        raise RuntimeError("已有正在进行的采样")
+    _active = session
+    try:
+        session.start()
+        return await session.wait()
+    finally:
+        session.stop()
+        _active = None
+
+
+class ProfilerMiddleware:
+    """为路由范围的采样标记请求；未采样时只多一次全局变量判断"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        session = _active
+        if session is None or scope["type"] != "http" or not session.claim(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # 协程帧位于该请求所有同步调用链上，采样线程据此过滤事件循环线程的栈
+        frame = sys._getframe()
+        session.enter(frame)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.exit(frame)
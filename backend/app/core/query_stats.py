@@ -0,0 +1,217 @@
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY, Histogram, route_template
+from app.core.metrics import Counter as MetricCounter
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_SECONDS = REGISTRY.register(
+    Histogram("db_query_duration_seconds", "Duration of individual SQL statements")
+)
+DB_QUERIES_PER_REQUEST = REGISTRY.register(
+    Histogram(
+        "db_queries_per_request",
+        "SQL statements issued per HTTP request",
+        ("route",),
+        buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    )
+)
+DB_QUERY_BUDGET_EXCEEDED = REGISTRY.register(
+    MetricCounter(
+        "db_query_budget_exceeded_total",
+        "Requests over the query budget or repeating a statement (N+1)",
+        ("route",),
+    )
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|(?<!:):\w+\b|__\[POSTCOMPILE_\w+\]")
+# IN (?, ?, ?) 的长度随参数变化，折叠后同一语句才能归并
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """DB_QUERY_BUDGET_ACTION=raise 时超出查询预算（测试中用于发现 N+1）"""
+
+
+def normalize_sql(statement: str) -> str:
+    """去掉字面量和参数差异，相同结构的语句得到相同文本"""
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _shape(parameters: Any) -> str:
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, list | tuple):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """只记录参数的类型（不记录值，避免日志中出现用户数据）"""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {_shape(rows[0])}" if rows else "[]"
+    return _shape(parameters)
+
+
+class QueryStats:
+    """一个请求（或一段代码）内执行的 SQL 语句统计"""
+
+    def __init__(self, budget: int, repeated_limit: int, action: str = "warn"):
+        self.budget = budget
+        self.repeated_limit = repeated_limit
+        self.action = action
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+        # 请求结束后，由请求派生的后台任务（继承了上下文）不再计入
+        self.closed = False
+
+    def record(self, sql: str, seconds: float) -> None:
+        if self.closed:
+            return
+        self.count += 1
+        self.seconds += seconds
+        self.statements[sql] += 1
+        if self.action == "raise" and self.violation() is not None:
+            raise QueryBudgetExceeded(self.violation())
+
+    def most_repeated(self) -> tuple[str, int]:
+        if not self.statements:
+            return "", 0
+        return self.statements.most_common(1)[0]
+
+    def violation(self) -> str | None:
+        sql, repeats = self.most_repeated()
+        if self.repeated_limit and repeats > self.repeated_limit:
+            return f"同一语句执行了 {repeats} 次（可能是 N+1）: {sql}"
+        if self.budget and self.count > self.budget:
+            return f"执行了 {self.count} 条语句，超出预算 {self.budget}"
+        return None
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def query_budget(
+    max_queries: int = 0, max_repeats: int = 0, action: str = "raise"
+) -> Iterator[QueryStats]:
+    """在代码块内统计查询，超出限制时抛出 QueryBudgetExceeded（默认），用于测试中断言查询次数"""
+    stats = QueryStats(max_queries, max_repeats, action)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        stats.closed = True
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    DB_QUERY_SECONDS.observe(elapsed)
+
+    settings = get_settings()
+    stats = _current.get()
+    slow = settings.db_slow_query_ms and elapsed * 1000 >= settings.db_slow_query_ms
+    if stats is None and not slow:
+        return
+
+    sql = normalize_sql(statement)
+    if slow:
+        logger.warning(
+            "慢查询 %.1f ms: %s | 参数: %s",
+            elapsed * 1000,
+            sql,
+            parameter_shape(parameters, executemany),
+        )
+    if stats is not None:
+        stats.record(sql, elapsed)
+
+
+def _handle_error(exception_context: Any) -> None:
+    # 出错的语句不会触发 after_cursor_execute，弹出对应的开始时间
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """给同步 Engine（AsyncEngine.sync_engine）挂上查询统计事件"""
+    if event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """按请求统计 SQL 语句数量和耗时，超出预算时记录警告"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        stats = QueryStats(
+            settings.db_query_budget,
+            settings.db_repeated_query_limit,
+            settings.db_query_budget_action,
+        )
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            stats.closed = True
+            route = route_template(scope)
+            DB_QUERIES_PER_REQUEST.observe(stats.count, route)
+            violation = stats.violation()
+            if violation is not None:
+                DB_QUERY_BUDGET_EXCEEDED.inc(route)
+                logger.warning(
+                    "%s %s: %d 条语句 / %.1f ms；%s",
+                    scope["method"],
+                    scope["path"],
+                    stats.count,
+                    stats.seconds * 1000,
+                    violation,
+                )
@@ -4,17 +4,30 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import admin, articles, auth, chat, health, search
+from app.api.routes import admin, articles, auth, chat, health, metrics, search
 from app.core.config import get_settings
-from app.core.database import init_db
+from app.core.database import close_db, init_db
+from app.core.http import close_http_client, init_http_client
+from app.core.metrics import MetricsMiddleware
+from app.core.profiler import ProfilerMiddleware
+from app.core.query_stats import QueryStatsMiddleware
+from app.services.snapshots import get_snapshot_publisher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    # Startup: initialize database
+    # Startup: initialize database and shared HTTP client
     await init_db()
+    await init_http_client()
+    publisher = get_snapshot_publisher()
+    if publisher is not None:
+        publisher.schedule()
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: close pooled connections
+    if publisher is not None:
+        await publisher.close()
+    await close_http_client()
+    await close_db()
 
 
 def create_app() -> FastAPI:
@@ -35,8 +48,16 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    app.add_middleware(QueryStatsMiddleware)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+    if settings.profiler_enabled:
+        app.add_middleware(ProfilerMiddleware)
+
     # Routes
     app.include_router(health.router, tags=["health"])
+    if settings.metrics_enabled:
+        app.include_router(metrics.router, tags=["metrics"])
     app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
     app.include_router(articles.router, prefix="/api/articles", tags=["articles"])
     app.include_router(search.router, prefix="/api/search", tags=["search"])
@@ -1,4 +1,4 @@
-from app.models.article import Article, ArticleCategory, ArticleStatus
+from app.models.article import Article, ArticleCategory, ArticleStatus, ArticleTag
 from app.models.user import AuthProvider, User, UserRole
 
 __all__ = [
@@ -8,4 +8,5 @@ __all__ = [
     "Article",
     "ArticleStatus",
     "ArticleCategory",
+    "ArticleTag",
 ]
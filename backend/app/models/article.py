@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import UTC, datetime
 from enum import Enum
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -21,6 +21,12 @@ class ArticleCategory(str, Enum):
 
 class Article(Base):
     __tablename__ = "articles"
+    __table_args__ = (
+        # Match list_articles: equality filters first, then the (created_at, id) sort key
+        Index("ix_articles_status_created", "status", "created_at", "id"),
+        Index("ix_articles_status_category_created", "status", "category", "created_at", "id"),
+        Index("ix_articles_created", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     slug: Mapped[str] = mapped_column(String(200), unique=True, index=True)
@@ -28,7 +34,8 @@ class Article(Base):
     excerpt: Mapped[str] = mapped_column(Text)
     content: Mapped[str] = mapped_column(Text)
     category: Mapped[str] = mapped_column(String(50), default=ArticleCategory.TUTORIAL.value)
-    tags: Mapped[str] = mapped_column(Text, default="")  # JSON string of tags
+    # JSON string of tags, kept for serialization; filtering uses ArticleTag
+    tags: Mapped[str] = mapped_column(Text, default="")
     status: Mapped[str] = mapped_column(String(20), default=ArticleStatus.DRAFT.value)
     read_time: Mapped[int] = mapped_column(Integer, default=5)
     gradient: Mapped[str] = mapped_column(
@@ -38,9 +45,10 @@ class Article(Base):
     # Foreign keys
     author_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"))
 
-    # Timestamps
+    # Timestamps; created_at is set in Python so that SQLite stores it in the same
+    # text format as bound datetimes (keyset cursors compare against it)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), default=lambda: datetime.now(UTC), server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -54,3 +62,18 @@ class Article(Base):
 
     def __repr__(self) -> str:
         return f"<Article {self.slug}>"
+
+
+class ArticleTag(Base):
+    """Article <-> tag association used for tag filtering."""
+
+    __tablename__ = "article_tags"
+    __table_args__ = (Index("ix_article_tags_tag_article", "tag", "article_id"),)
+
+    article_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    def __repr__(self) -> str:
+        return f"<ArticleTag {self.article_id} {self.tag}>"
@@ -58,13 +58,6 @@ class ArticleResponse(BaseModel):
         from_attributes = True
 
 
-class ArticleListResponse(BaseModel):
-    items: list[ArticleResponse]
-    total: int
-    page: int
-    page_size: int
-
-
 class ArticleBriefResponse(BaseModel):
     """Brief article info without content."""
 
@@ -90,3 +83,31 @@ class ArticleBriefResponse(BaseModel):
             except json.JSONDecodeError:
                 return []
         return v
+
+
+class ArticleListResponse(BaseModel):
+    items: list[ArticleBriefResponse]
+    total: int | None
+    page: int
+    page_size: int
+    next_cursor: str | None = None
+
+
+class ArticleImport(ArticleCreate):
+    """One NDJSON line of an article import/export."""
+
+    created_at: datetime | None = None
+    published_at: datetime | None = None
+
+
+class ArticleImportError(BaseModel):
+    line: int
+    slug: str | None = None
+    error: str
+
+
+class ArticleImportResponse(BaseModel):
+    inserted: int
+    updated: int
+    failed: int
+    errors: list[ArticleImportError]
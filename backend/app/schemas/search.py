@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 
@@ -16,3 +18,29 @@ class SearchResult(BaseModel):
 class SearchResponse(BaseModel):
     results: list[SearchResult]
     query: str
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[SearchRequest] = Field(..., min_length=1, max_length=32, description="查询列表")
+
+
+class BatchSearchResponse(BaseModel):
+    # 与请求中的 queries 顺序一致
+    responses: list[SearchResponse]
+
+
+class ArticleSearchResult(BaseModel):
+    id: str
+    slug: str
+    title: str
+    excerpt: str
+    category: str
+    published_at: datetime | None = None
+    title_highlight: str
+    snippet: str | None = None
+    score: float
+
+
+class ArticleSearchResponse(BaseModel):
+    results: list[ArticleSearchResult]
+    query: str
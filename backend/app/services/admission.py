@@ -0,0 +1,154 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from app.core.config import get_settings
+
+
+class AdmissionRejected(Exception):
+    """请求未被接纳（限流或排队已满）"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多 capacity 个"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """取一个令牌，成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Permit:
+    """已接纳请求的许可，生成结束后必须释放"""
+
+    def __init__(self, controller: "AdmissionController", client: str):
+        self._controller = controller
+        self._client = client
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self._client)
+
+
+class AdmissionController:
+    """LLM 生成的准入控制
+
+    - 全局同时生成数上限，超出的请求进入有界队列等待，等待超时返回 503
+    - 每个用户/IP 的并发上限和令牌桶限速，超出返回 429
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+        per_client_concurrency: int = 2,
+        rate_per_minute: float = 20.0,
+        burst: int = 5,
+        max_clients: int = 10000,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_client_concurrency = per_client_concurrency
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._client_active: dict[str, int] = {}
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[client] = bucket
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def _reject(self, status_code: int, detail: str, retry_after: float) -> AdmissionRejected:
+        self.rejected += 1
+        return AdmissionRejected(status_code, detail, retry_after)
+
+    async def acquire(self, client: str) -> Permit:
+        """申请生成许可，被拒绝时抛出 AdmissionRejected"""
+        if self.rate > 0:
+            wait = self._bucket(client).take()
+            if wait > 0:
+                raise self._reject(429, "请求过于频繁，请稍后再试", wait)
+
+        if self._client_active.get(client, 0) >= self.per_client_concurrency:
+            raise self._reject(429, "同时进行的对话过多，请等待当前回答完成", 1)
+
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise self._reject(503, "服务繁忙，请稍后再试", self.queue_timeout)
+
+        # 排队中的请求也计入该用户的并发数，避免单个用户占满队列
+        self._client_active[client] = self._client_active.get(client, 0) + 1
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except TimeoutError:
+            self._decrement(client)
+            raise self._reject(503, "服务繁忙，请稍后再试", self.queue_timeout) from None
+        except BaseException:
+            self._decrement(client)
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        return Permit(self, client)
+
+    def _decrement(self, client: str) -> None:
+        remaining = self._client_active.get(client, 0) - 1
+        if remaining > 0:
+            self._client_active[client] = remaining
+        else:
+            self._client_active.pop(client, None)
+
+    def _release(self, client: str) -> None:
+        self.in_flight -= 1
+        self._decrement(client)
+        self._semaphore.release()
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        max_in_flight=settings.chat_max_in_flight,
+        max_queue=settings.chat_max_queue,
+        queue_timeout=settings.chat_queue_timeout,
+        per_client_concurrency=settings.chat_per_client_concurrency,
+        rate_per_minute=settings.chat_rate_per_minute,
+        burst=settings.chat_rate_burst,
+    )
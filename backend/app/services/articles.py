@@ -0,0 +1,48 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from app.models import Article
+
+# ArticleBriefResponse 需要的列（除正文外的全部字段）
+BRIEF_COLUMNS = (
+    Article.id,
+    Article.slug,
+    Article.title,
+    Article.excerpt,
+    Article.category,
+    Article.tags,
+    Article.status,
+    Article.read_time,
+    Article.gradient,
+    Article.created_at,
+    Article.published_at,
+)
+
+
+def encode_cursor(created_at: datetime, article_id: str) -> str:
+    """生成指向该行之后的不透明游标（按 created_at, id 倒序分页）"""
+    raw = json.dumps([created_at.isoformat(), article_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """解析 encode_cursor 生成的游标，格式不正确时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, article_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(article_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"无效的游标: {cursor!r}") from e
+
+
+def calculate_read_time(content: str) -> int:
+    """按约每分钟 200 词估算阅读时长（分钟）"""
+    words = len(content.split())
+    return max(1, words // 200)
+
+
+def normalize_tags(tags: list[str]) -> list[str]:
+    """去掉首尾空白、空标签和重复标签，保持原有顺序"""
+    return list(dict.fromkeys(t.strip() for t in tags if t.strip()))
@@ -0,0 +1,145 @@
+import html
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+# FTS5 外部内容表：只保存索引，正文仍在 articles 表中。
+# trigram 分词器按三个字符切分，不依赖空格，中文也能检索。
+# articles 没有 INTEGER 主键，VACUUM 可能改变 rowid，因此每次启动都执行 'rebuild'；
+# 运行期间对数据库执行 VACUUM 后需要重启服务。
+FTS_TABLE_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, excerpt, content,
+    content='articles', content_rowid='rowid',
+    tokenize='trigram'
+)
+"""
+
+FTS_TRIGGERS_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts(rowid, title, excerpt, content)
+        VALUES (new.rowid, new.title, new.excerpt, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.rowid, old.title, old.excerpt, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF title, excerpt, content
+    ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.rowid, old.title, old.excerpt, old.content);
+        INSERT INTO articles_fts(rowid, title, excerpt, content)
+        VALUES (new.rowid, new.title, new.excerpt, new.content);
+    END
+    """,
+]
+
+# trigram 分词器无法匹配少于三个字符的词
+MIN_TERM_LENGTH = 3
+
+# highlight/snippet 先用私有区字符标出命中位置，转义 HTML 之后再替换为 <mark>，
+# 文章中的标签不会原样输出
+MARK_OPEN = "\ue000"
+MARK_CLOSE = "\ue001"
+
+_MATCH_SQL = """
+SELECT a.id, a.slug, a.title, a.excerpt, a.category, a.published_at,
+       highlight(articles_fts, 0, :mark_open, :mark_close) AS title_highlight,
+       snippet(articles_fts, 2, :mark_open, :mark_close, '…', 24) AS snippet,
+       -bm25(articles_fts, 10.0, 5.0, 1.0) AS score
+FROM articles_fts
+JOIN articles a ON a.rowid = articles_fts.rowid
+WHERE articles_fts MATCH :match {status_filter}
+ORDER BY bm25(articles_fts, 10.0, 5.0, 1.0)
+LIMIT :limit
+"""
+
+# highlight/snippet 只能用于 MATCH 查询，LIKE 回退时返回原始标题和摘要
+_LIKE_SQL = """
+SELECT a.id, a.slug, a.title, a.excerpt, a.category, a.published_at,
+       a.title AS title_highlight,
+       a.excerpt AS snippet,
+       0.0 AS score
+FROM articles_fts
+JOIN articles a ON a.rowid = articles_fts.rowid
+WHERE {conditions} {status_filter}
+ORDER BY a.created_at DESC
+LIMIT :limit
+"""
+
+
+async def ensure_fulltext_index(conn: AsyncConnection) -> None:
+    """创建 FTS5 索引和同步触发器（仅 SQLite），并按当前 rowid 重建索引"""
+    if conn.dialect.name != "sqlite":
+        return
+
+    await conn.execute(text(FTS_TABLE_DDL))
+    for ddl in FTS_TRIGGERS_DDL:
+        await conn.execute(text(ddl))
+    await conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')"))
+
+
+def render_highlight(fragment: str | None) -> str | None:
+    """转义 highlight/snippet 的结果，再把命中标记替换为 <mark>"""
+    if fragment is None:
+        return None
+    escaped = html.escape(fragment, quote=False)
+    return escaped.replace(MARK_OPEN, "<mark>").replace(MARK_CLOSE, "</mark>")
+
+
+def _terms(query: str) -> list[str]:
+    return [term for term in query.split() if term]
+
+
+def build_match_expression(query: str) -> str:
+    """把用户输入转换为 FTS5 MATCH 表达式：每个词作为短语，词之间为 AND"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in _terms(query))
+
+
+async def search_articles(
+    db: AsyncSession,
+    query: str,
+    limit: int = 10,
+    published_only: bool = True,
+) -> list[dict[str, Any]]:
+    """关键词检索文章，按 bm25 排序并返回高亮片段"""
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    params: dict[str, Any] = {"limit": limit}
+    status_filter = "AND a.status = 'published'" if published_only else ""
+
+    if all(len(term) >= MIN_TERM_LENGTH for term in terms):
+        # bm25 越小越相关，取负数作为分数；标题权重 > 摘要 > 正文
+        params.update(
+            match=build_match_expression(query), mark_open=MARK_OPEN, mark_close=MARK_CLOSE
+        )
+        sql = _MATCH_SQL.format(status_filter=status_filter)
+    else:
+        # 短词无法使用 trigram 索引，退化为 LIKE 扫描索引表
+        conditions = []
+        for i, term in enumerate(terms):
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params[f"term{i}"] = f"%{escaped}%"
+            conditions.append(
+                f"(articles_fts.title LIKE :term{i} ESCAPE '\\' "
+                f"OR articles_fts.excerpt LIKE :term{i} ESCAPE '\\' "
+                f"OR articles_fts.content LIKE :term{i} ESCAPE '\\')"
+            )
+        sql = _LIKE_SQL.format(conditions=" AND ".join(conditions), status_filter=status_filter)
+
+    result = await db.execute(text(sql), params)
+    rows = []
+    for row in result.mappings():
+        item = dict(row)
+        item["title_highlight"] = render_highlight(item["title_highlight"])
+        item["snippet"] = render_highlight(item["snippet"])
+        rows.append(item)
+    return rows
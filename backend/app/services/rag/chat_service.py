@@ -1,15 +1,30 @@
-import json
+import asyncio
+import logging
+import time
 from collections.abc import AsyncGenerator
-from functools import lru_cache
+from contextlib import aclosing
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from typing import Any
 
 import google.generativeai as genai
+import httpx
 from anthropic import AsyncAnthropic
 from openai import AsyncOpenAI
 
 from app.core.config import get_settings
+from app.core.http import get_http_client, http_timeout
+from app.core.metrics import LLM_GENERATION_SECONDS, LLM_TTFT_SECONDS, RAG_STAGE_SECONDS
 from app.schemas.chat import ChatMessage
+from app.services.rag.failover import Candidate, CircuitBreaker, hedged_stream
+from app.services.rag.history import HistoryManager, estimate_tokens
 from app.services.rag.vector_store import get_vector_store
+from app.services.singleflight import SingleFlight, StreamSingleFlight, make_key
+from app.services.sse import DONE_FRAME, coalesce, sse_event
+
+logger = logging.getLogger(__name__)
+
+MAX_OUTPUT_TOKENS = 1000
 
 SYSTEM_PROMPT = """你是一个网站内容检索助手。你的任务是基于提供的网站内容回答用户的问题。
 
@@ -23,6 +38,33 @@ SYSTEM_PROMPT = """你是一个网站内容检索助手。你的任务是基于
 {context}
 """
 
+HISTORY_SUMMARY_PROMPT = """
+之前的对话摘要：
+{summary}
+"""
+
+SUMMARIZE_PROMPT = """你负责压缩对话历史。请把已有摘要和新的对话内容合并成一段简洁的摘要，
+保留用户的问题、关键事实和尚未解决的事项，不要添加对话中没有的信息。摘要不超过 300 字。"""
+
+
+@dataclass
+class CancellationStats:
+    """被取消的 LLM 生成（客户端断开或对冲请求落败）"""
+
+    count: int = 0
+    tokens_generated: int = 0
+    # 按 MAX_OUTPUT_TOKENS 计算的上限：实际回答可能在达到上限之前就结束
+    tokens_saved_upper_bound: int = 0
+
+    def record(self, backend: str, generated: int) -> None:
+        saved = max(0, MAX_OUTPUT_TOKENS - generated)
+        self.count += 1
+        self.tokens_generated += generated
+        self.tokens_saved_upper_bound += saved
+        logger.info(
+            "LLM 生成已取消 %s: 已生成约 %d token，最多节省约 %d token", backend, generated, saved
+        )
+
 
 class ChatService:
     """RAG 聊天服务"""
@@ -30,19 +72,75 @@ class ChatService:
     def __init__(self):
         self.settings = get_settings()
         self.vector_store = get_vector_store()
+        self._chat_flight: SingleFlight[tuple[str, list[dict]]] = SingleFlight()
+        self._stream_flight: StreamSingleFlight[str] = StreamSingleFlight()
+        self.cancellations = CancellationStats()
+        self.history = HistoryManager(
+            summarize=self._summarize_history,
+            max_tokens=self.settings.history_max_tokens,
+            cache_size=self.settings.history_summary_cache_size,
+        )
+
+        # 按顺序排列的 LLM 后端，每个后端有独立的熔断器
+        self.backends = self._parse_backends()
+        self.breakers = {
+            name: CircuitBreaker(
+                failure_threshold=self.settings.llm_breaker_failures,
+                reset_seconds=self.settings.llm_breaker_reset_seconds,
+            )
+            for name, _, _ in self.backends
+        }
+        providers = {provider for _, provider, _ in self.backends}
+
+        # SDK 客户端绑定共享 HTTP 客户端；后者关闭重建后（如 lifespan 重启）随之重建
+        self._openai: tuple[httpx.AsyncClient, AsyncOpenAI] | None = None
+        self._anthropic: tuple[httpx.AsyncClient, AsyncAnthropic] | None = None
+        if "gemini" in providers:
+            # Gemini SDK 使用自带的 gRPC 传输，无法共享 HTTP 连接池
+            genai.configure(api_key=self.settings.gemini_api_key)
+            self.gemini_models: dict[str, genai.GenerativeModel] = {}
 
-        if self.settings.llm_provider == "openai":
-            self.openai_client = AsyncOpenAI(
+    @property
+    def openai_client(self) -> AsyncOpenAI:
+        http_client = get_http_client()
+        if self._openai is None or self._openai[0] is not http_client:
+            client = AsyncOpenAI(
                 api_key=self.settings.openai_api_key,
                 base_url=self.settings.openai_base_url,
+                http_client=http_client,
+                timeout=http_timeout(),
             )
-        elif self.settings.llm_provider == "anthropic":
-            self.anthropic_client = AsyncAnthropic(
+            self._openai = (http_client, client)
+        return self._openai[1]
+
+    @property
+    def anthropic_client(self) -> AsyncAnthropic:
+        http_client = get_http_client()
+        if self._anthropic is None or self._anthropic[0] is not http_client:
+            client = AsyncAnthropic(
                 api_key=self.settings.anthropic_api_key,
+                base_url=self.settings.anthropic_base_url,
+                http_client=http_client,
+                timeout=http_timeout(),
             )
-        elif self.settings.llm_provider == "gemini":
-            genai.configure(api_key=self.settings.gemini_api_key)
-            self.gemini_model = genai.GenerativeModel(self.settings.gemini_model)
+            self._anthropic = (http_client, client)
+        return self._anthropic[1]
+
+    def _parse_backends(self) -> list[tuple[str, str, str]]:
+        """解析 LLM 后端列表，返回 [(名称, 提供商, 模型)]"""
+        default_models = {
+            "openai": self.settings.openai_model,
+            "anthropic": self.settings.anthropic_model,
+            "gemini": self.settings.gemini_model,
+        }
+        backends = []
+        for entry in self.settings.llm_providers or [self.settings.llm_provider]:
+            provider, _, model = entry.partition(":")
+            if provider not in default_models:
+                raise ValueError(f"Unknown LLM provider: {provider}")
+            model = model or default_models[provider]
+            backends.append((f"{provider}:{model}", provider, model))
+        return backends
 
     def _build_context(self, search_results: list[dict[str, Any]]) -> str:
         """构建上下文"""
@@ -58,30 +156,74 @@ class ChatService:
             )
         return "\n---\n".join(context_parts)
 
+    def _build_system_prompt(self, context: str, summary: str | None) -> str:
+        """构建系统提示（含更早对话的摘要）"""
+        system_prompt = SYSTEM_PROMPT.format(context=context)
+        if summary:
+            system_prompt += HISTORY_SUMMARY_PROMPT.format(summary=summary)
+        return system_prompt
+
+    async def _prepare(
+        self, message: str, history: list[ChatMessage]
+    ) -> tuple[list[dict[str, Any]], str, list[dict]]:
+        """并行检索内容和整理对话历史，返回 (检索结果, 系统提示, 消息)"""
+        search_results, (messages, summary) = await asyncio.gather(
+            self.vector_store.search_async(query=message, limit=3),
+            self.history.prepare(history),
+        )
+        with RAG_STAGE_SECONDS.time("_build_context"):
+            context = self._build_context(search_results)
+        system_prompt = self._build_system_prompt(context, summary)
+        messages.append({"role": "user", "content": message})
+        return search_results, system_prompt, messages
+
+    async def _summarize_history(self, previous: str | None, messages: list[dict]) -> str:
+        """把移出窗口的消息合并进滚动摘要"""
+        transcript = "\n".join(
+            f"{'用户' if m['role'] == 'user' else '助手'}: {m['content']}" for m in messages
+        )
+        content = f"已有摘要：\n{previous or '无'}\n\n新的对话内容：\n{transcript}"
+        return await self._complete(SUMMARIZE_PROMPT, [{"role": "user", "content": content}])
+
+    async def _complete(self, system_prompt: str, messages: list[dict]) -> str:
+        """调用 LLM（非流式），与流式共用故障切换和对冲逻辑"""
+        stream = self._stream(system_prompt, messages)
+        async with aclosing(stream):
+            return "".join([chunk async for chunk in stream])
+
+    def _request_key(self, message: str, history: list[ChatMessage]) -> str:
+        """相同消息和历史的请求使用相同的 key"""
+        return make_key(
+            [name for name, _, _ in self.backends],
+            message.strip(),
+            [(m.role, m.content) for m in history],
+        )
+
     async def chat(
         self,
         message: str,
         history: list[ChatMessage],
     ) -> tuple[str, list[dict]]:
-        """执行 RAG 聊天"""
-        # 1. 检索相关内容
-        search_results = self.vector_store.search(query=message, limit=3)
+        """执行 RAG 聊天（相同的并发请求只生成一次）"""
+        if not self.settings.request_coalescing:
+            return await self._chat(message, history)
 
-        # 2. 构建上下文
-        context = self._build_context(search_results)
-        system_prompt = SYSTEM_PROMPT.format(context=context)
+        return await self._chat_flight.do(
+            self._request_key(message, history),
+            lambda: self._chat(message, history),
+        )
 
-        # 3. 构建消息
-        messages = [{"role": m.role, "content": m.content} for m in history]
-        messages.append({"role": "user", "content": message})
+    async def _chat(
+        self,
+        message: str,
+        history: list[ChatMessage],
+    ) -> tuple[str, list[dict]]:
+        """执行 RAG 聊天"""
+        # 1-3. 检索相关内容、构建上下文和消息（历史超出预算的部分压缩为摘要）
+        search_results, system_prompt, messages = await self._prepare(message, history)
 
         # 4. 调用 LLM
-        if self.settings.llm_provider == "openai":
-            response = await self._chat_openai(system_prompt, messages)
-        elif self.settings.llm_provider == "anthropic":
-            response = await self._chat_anthropic(system_prompt, messages)
-        else:  # gemini
-            response = await self._chat_gemini(system_prompt, messages)
+        response = await self._complete(system_prompt, messages)
 
         # 5. 返回结果和来源
         sources = [
@@ -90,112 +232,130 @@ class ChatService:
         ]
         return response, sources
 
-    async def _chat_openai(self, system_prompt: str, messages: list[dict]) -> str:
-        """OpenAI 聊天"""
-        response = await self.openai_client.chat.completions.create(
-            model=self.settings.openai_model,
-            messages=[{"role": "system", "content": system_prompt}, *messages],
-            temperature=0.7,
-            max_tokens=1000,
-        )
-        return response.choices[0].message.content or ""
-
-    async def _chat_anthropic(self, system_prompt: str, messages: list[dict]) -> str:
-        """Anthropic 聊天"""
-        response = await self.anthropic_client.messages.create(
-            model=self.settings.anthropic_model,
-            system=system_prompt,
-            messages=messages,
-            max_tokens=1000,
-        )
-        return response.content[0].text
-
-    async def _chat_gemini(self, system_prompt: str, messages: list[dict]) -> str:
-        """Gemini 聊天"""
-        # 构建 Gemini 格式的对话历史
-        gemini_history = []
-        for msg in messages[:-1]:  # 除了最后一条消息
-            role = "user" if msg["role"] == "user" else "model"
-            gemini_history.append({"role": role, "parts": [msg["content"]]})
-
-        # 创建带历史的聊天
-        chat = self.gemini_model.start_chat(history=gemini_history)
-
-        # 构建包含系统提示的用户消息
-        user_message = messages[-1]["content"]
-        full_message = f"{system_prompt}\n\n用户问题：{user_message}"
-
-        # 发送消息并获取响应
-        response = await chat.send_message_async(full_message)
-        return response.text
-
     async def chat_stream(
         self,
         message: str,
         history: list[ChatMessage],
     ) -> AsyncGenerator[str, None]:
-        """流式 RAG 聊天"""
-        # 1. 检索相关内容
-        search_results = self.vector_store.search(query=message, limit=3)
+        """流式 RAG 聊天（相同的并发请求共享同一个流，并从头接收）"""
+        if not self.settings.request_coalescing:
+            stream = self._chat_stream(message, history)
+        else:
+            stream = self._stream_flight.stream(
+                self._request_key(message, history),
+                lambda: self._chat_stream(message, history),
+            )
 
-        # 2. 构建上下文
-        context = self._build_context(search_results)
-        system_prompt = SYSTEM_PROMPT.format(context=context)
+        async with aclosing(stream):
+            async for frame in stream:
+                yield frame
 
-        # 3. 构建消息
-        messages = [{"role": m.role, "content": m.content} for m in history]
-        messages.append({"role": "user", "content": message})
+    async def _chat_stream(
+        self,
+        message: str,
+        history: list[ChatMessage],
+    ) -> AsyncGenerator[str, None]:
+        """流式 RAG 聊天"""
+        # 1-3. 检索相关内容、构建上下文和消息（历史超出预算的部分压缩为摘要）
+        search_results, system_prompt, messages = await self._prepare(message, history)
 
         # 4. 发送来源信息
         sources = [
             {"title": r["title"], "url": r["url"], "score": r["score"]}
             for r in search_results
         ]
-        yield f"data: {json.dumps({'type': 'sources', 'data': sources})}\n\n"
-
-        # 5. 流式调用 LLM
-        if self.settings.llm_provider == "openai":
-            async for chunk in self._stream_openai(system_prompt, messages):
-                yield f"data: {json.dumps({'type': 'content', 'data': chunk})}\n\n"
-        elif self.settings.llm_provider == "anthropic":
-            async for chunk in self._stream_anthropic(system_prompt, messages):
-                yield f"data: {json.dumps({'type': 'content', 'data': chunk})}\n\n"
-        else:  # gemini
-            async for chunk in self._stream_gemini(system_prompt, messages):
-                yield f"data: {json.dumps({'type': 'content', 'data': chunk})}\n\n"
+        yield sse_event({"type": "sources", "data": sources})
+
+        # 5. 流式调用 LLM，细碎的增量按时间和大小合并成帧
+        deltas = coalesce(
+            self._stream(system_prompt, messages),
+            max_delay=self.settings.sse_coalesce_ms / 1000,
+            max_bytes=self.settings.sse_coalesce_bytes,
+        )
+        async with aclosing(deltas):
+            async for chunk in deltas:
+                yield sse_event({"type": "content", "data": chunk})
+
+        yield DONE_FRAME
+
+    def _stream(self, system_prompt: str, messages: list[dict]) -> AsyncGenerator[str, None]:
+        """流式调用 LLM：首个 token 超时启动备份请求，失败时切换到下一个后端"""
+        candidates = [
+            Candidate(
+                name=name,
+                breaker=self.breakers[name],
+                factory=partial(
+                    self._stream_backend, name, provider, model, system_prompt, messages
+                ),
+            )
+            for name, provider, model in self.backends
+        ]
+        hedge_delay = self.settings.llm_hedge_delay_ms / 1000 or None
+        return hedged_stream(candidates, hedge_delay=hedge_delay)
 
-        yield "data: [DONE]\n\n"
+    async def _stream_backend(
+        self, name: str, provider: str, model: str, system_prompt: str, messages: list[dict]
+    ) -> AsyncGenerator[str, None]:
+        """调用指定提供商（流式），生成被中途取消时记录节省的 token"""
+        if provider == "openai":
+            stream = self._stream_openai(model, system_prompt, messages)
+        elif provider == "anthropic":
+            stream = self._stream_anthropic(model, system_prompt, messages)
+        else:  # gemini
+            stream = self._stream_gemini(model, system_prompt, messages)
+
+        generated = 0
+        started = time.perf_counter()
+        first_token = True
+        outcome = "error"
+        try:
+            async for chunk in stream:
+                if first_token:
+                    first_token = False
+                    LLM_TTFT_SECONDS.observe(time.perf_counter() - started, name)
+                generated += estimate_tokens(chunk)
+                yield chunk
+            outcome = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"
+            self.cancellations.record(name, generated)
+            raise
+        finally:
+            LLM_GENERATION_SECONDS.observe(time.perf_counter() - started, name, outcome)
+            # 关闭提供商的流，释放底层 HTTP 连接
+            await stream.aclose()
 
     async def _stream_openai(
-        self, system_prompt: str, messages: list[dict]
+        self, model: str, system_prompt: str, messages: list[dict]
     ) -> AsyncGenerator[str, None]:
         """OpenAI 流式输出"""
         stream = await self.openai_client.chat.completions.create(
-            model=self.settings.openai_model,
+            model=model,
             messages=[{"role": "system", "content": system_prompt}, *messages],
             temperature=0.7,
-            max_tokens=1000,
+            max_tokens=MAX_OUTPUT_TOKENS,
             stream=True,
         )
-        async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
     async def _stream_anthropic(
-        self, system_prompt: str, messages: list[dict]
+        self, model: str, system_prompt: str, messages: list[dict]
     ) -> AsyncGenerator[str, None]:
         """Anthropic 流式输出"""
         async with self.anthropic_client.messages.stream(
-            model=self.settings.anthropic_model,
+            model=model,
             system=system_prompt,
             messages=messages,
-            max_tokens=1000,
+            max_tokens=MAX_OUTPUT_TOKENS,
         ) as stream:
             async for text in stream.text_stream:
                 yield text
 
     async def _stream_gemini(
-        self, system_prompt: str, messages: list[dict]
+        self, model: str, system_prompt: str, messages: list[dict]
     ) -> AsyncGenerator[str, None]:
         """Gemini 流式输出"""
         # 构建 Gemini 格式的对话历史
@@ -205,7 +365,9 @@ class ChatService:
             gemini_history.append({"role": role, "parts": [msg["content"]]})
 
         # 创建带历史的聊天
-        chat = self.gemini_model.start_chat(history=gemini_history)
+        if model not in self.gemini_models:
+            self.gemini_models[model] = genai.GenerativeModel(model)
+        chat = self.gemini_models[model].start_chat(history=gemini_history)
 
         # 构建包含系统提示的用户消息
         user_message = messages[-1]["content"]
@@ -0,0 +1,84 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+
+SIMHASH_BITS = 64
+# 字符 n-gram，中英文都不依赖分词
+SHINGLE_SIZE = 4
+# 出现在至少这么多页面中才可能被判定为样板文本
+BOILERPLATE_MIN_PAGES = 3
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """64 位 SimHash：相似文本的签名只有少数位不同"""
+    text = _normalize(text)
+    shingles = Counter(
+        text[i : i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))
+    )
+    weights = [0] * SIMHASH_BITS
+    for shingle, count in shingles.items():
+        value = _token_hash(shingle)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+class NearDuplicateIndex:
+    """判断文本是否与已见过的文本近似重复（SimHash 汉明距离 <= max_distance）
+
+    签名切成 max_distance + 1 段：距离不超过 max_distance 的两个签名至少有一段完全相同，
+    只需和同段相同的候选比较，不必两两比较。
+    """
+
+    def __init__(self, max_distance: int = 3):
+        if not 0 <= max_distance < SIMHASH_BITS:
+            raise ValueError(f"max_distance 必须在 0 到 {SIMHASH_BITS - 1} 之间: {max_distance}")
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self._buckets: list[dict[int, list[int]]] = [{} for _ in range(self.bands)]
+
+    def _band_keys(self, signature: int) -> Iterable[tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield band, signature >> (band * self.band_bits) & mask
+
+    def contains(self, signature: int) -> bool:
+        for band, key in self._band_keys(signature):
+            for candidate in self._buckets[band].get(key, ()):
+                if (candidate ^ signature).bit_count() <= self.max_distance:
+                    return True
+        return False
+
+    def add(self, signature: int) -> None:
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, []).append(signature)
+
+    def seen(self, text: str) -> bool:
+        """已有近似文本时返回 True；否则记录该文本并返回 False"""
+        signature = simhash(text)
+        if self.contains(signature):
+            return True
+        self.add(signature)
+        return False
+
+
+def find_boilerplate_lines(pages: list[list[str]], ratio: float) -> set[str]:
+    """在至少 ratio 比例（且不少于 BOILERPLATE_MIN_PAGES 个）页面中出现的行"""
+    min_pages = max(BOILERPLATE_MIN_PAGES, math.ceil(len(pages) * ratio))
+    if len(pages) < min_pages:
+        return set()
+    frequency = Counter(line for lines in pages for line in set(lines))
+    return {line for line, count in frequency.items() if count >= min_pages}
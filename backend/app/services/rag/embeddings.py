@@ -19,6 +19,10 @@ class EmbeddingService(ABC):
         """生成查询的向量表示"""
         pass
 
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """批量生成查询的向量表示（子类应覆盖为一次调用）"""
+        return [self.embed_query(query) for query in queries]
+
 
 class GeminiEmbeddingService(EmbeddingService):
     """Gemini Embedding 服务"""
@@ -43,6 +47,14 @@ class GeminiEmbeddingService(EmbeddingService):
         )
         return result["embedding"]
 
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        result = genai.embed_content(
+            model=self.model_name,
+            content=queries,
+            task_type="retrieval_query",
+        )
+        return result["embedding"]
+
 
 class LocalEmbeddingService(EmbeddingService):
     """本地 Embedding 服务，使用 sentence-transformers"""
@@ -60,6 +72,10 @@ class LocalEmbeddingService(EmbeddingService):
         embedding = self.model.encode(query, convert_to_numpy=True)
         return embedding.tolist()
 
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        embeddings = self.model.encode(queries, convert_to_numpy=True)
+        return embeddings.tolist()
+
 
 @lru_cache
 def get_embedding_service() -> EmbeddingService:
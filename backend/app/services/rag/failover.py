@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator, Callable
+from contextlib import suppress
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+class AllProvidersFailedError(RuntimeError):
+    """所有 LLM 提供商都失败"""
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，冷却期后放行一次试探请求
+
+    半开状态下同一时间只有一个试探请求；试探结束（成功、失败或 release）之前拒绝其他调用。
+    试探请求超过 reset_seconds 仍未结束时视为丢失，允许下一个试探。
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_started: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    @property
+    def probing(self) -> bool:
+        """是否有试探请求正在进行"""
+        return (
+            self._probe_started is not None
+            and time.monotonic() - self._probe_started < self.reset_seconds
+        )
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "open" or (state == "half-open" and self.probing):
+            return False
+        if state == "half-open":
+            self._probe_started = time.monotonic()
+        return True
+
+    def release(self) -> None:
+        """放行的请求没有结果（未启动或被取消）时调用，让出试探名额"""
+        self._probe_started = None
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_started = None
+        if self.failures >= self.failure_threshold:
+            # 半开状态下的试探失败会重新计时
+            self.opened_at = time.monotonic()
+
+
+@dataclass
+class Candidate:
+    """一个可用的 LLM 后端"""
+
+    name: str
+    breaker: CircuitBreaker
+    factory: Callable[[], AsyncGenerator[str, None]]
+
+
+@dataclass
+class _Attempt:
+    candidate: Candidate
+    stream: AsyncGenerator[str, None]
+    first: asyncio.Future[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.first = asyncio.ensure_future(anext(self.stream))
+
+    async def cancel(self) -> None:
+        self.first.cancel()
+        with suppress(BaseException):
+            await self.first
+        with suppress(Exception):
+            await self.stream.aclose()
+
+
+async def hedged_stream(
+    candidates: list[Candidate],
+    hedge_delay: float | None = None,
+) -> AsyncGenerator[str, None]:
+    """按顺序尝试多个后端的流式输出
+
+    - 首个 token 之前出错：立即切换到下一个后端
+    - hedge_delay 秒内没有首个 token：启动下一个后端作为备份，
+      谁先产生首个 token 就使用谁，取消另一个
+    - 首个 token 之后出错：无法透明切换，直接抛出
+    - 所有后端都处于熔断中：立即抛出 AllProvidersFailedError
+    """
+    # 全部熔断（且没有到期的试探）时立即失败，不再等待上游超时
+    queue = [c for c in candidates if c.breaker.allow()]
+    if not queue:
+        raise AllProvidersFailedError("all LLM providers are unavailable (circuit open)")
+    loop = asyncio.get_running_loop()
+
+    attempts: list[_Attempt] = []
+    next_hedge_at: float | None = None
+    errors: list[str] = []
+
+    def start_next() -> None:
+        nonlocal next_hedge_at
+        candidate = queue.pop(0)
+        attempts.append(_Attempt(candidate, candidate.factory()))
+        next_hedge_at = loop.time() + hedge_delay if hedge_delay else None
+
+    winner: _Attempt | None = None
+    first_chunk: str | None = None
+    start_next()
+
+    try:
+        while attempts and winner is None:
+            timeout = None
+            if queue and next_hedge_at is not None:
+                timeout = max(0.0, next_hedge_at - loop.time())
+
+            done, _ = await asyncio.wait(
+                {a.first for a in attempts},
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                logger.info("LLM 首个 token 超时，启动备份请求: %s", queue[0].name)
+                start_next()
+                continue
+
+            for attempt in [a for a in attempts if a.first in done]:
+                attempts.remove(attempt)
+                try:
+                    first_chunk = attempt.first.result()
+                except StopAsyncIteration:
+                    first_chunk = None
+                except Exception as e:
+                    attempt.candidate.breaker.record_failure()
+                    errors.append(f"{attempt.candidate.name}: {e!r}")
+                    logger.warning("LLM 后端失败 %s: %r", attempt.candidate.name, e)
+                    continue
+                winner = attempt
+                break
+
+            if winner is None and not attempts and queue:
+                start_next()
+    finally:
+        for candidate in queue:
+            candidate.breaker.release()
+        for attempt in attempts:
+            attempt.candidate.breaker.release()
+            await attempt.cancel()
+
+    if winner is None:
+        raise AllProvidersFailedError("; ".join(errors) or "no LLM provider available")
+
+    winner.candidate.breaker.record_success()
+    if first_chunk is None:
+        return
+
+    try:
+        yield first_chunk
+        async for chunk in winner.stream:
+            yield chunk
+    except Exception:
+        winner.candidate.breaker.record_failure()
+        raise
+    finally:
+        await winner.stream.aclose()
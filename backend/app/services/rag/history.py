@@ -0,0 +1,112 @@
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from app.schemas.chat import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# 中日韩字符大约一个字一个 token，其余文本大约四个字符一个 token
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+# summarize(上一次的摘要, 需要合并进摘要的消息) -> 新摘要
+Summarizer = Callable[[str | None, list[dict]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _message_tokens(message: ChatMessage) -> int:
+    # 每条消息额外计入角色等格式开销
+    return estimate_tokens(message.content) + 4
+
+
+class HistoryManager:
+    """对话历史管理：最近的消息在 token 预算内原样保留，更早的消息压缩为滚动摘要
+
+    摘要按消息前缀的哈希缓存。下一轮对话只需要把新移出窗口的消息合并进
+    已缓存的摘要，而不是重新总结整段历史。
+    """
+
+    def __init__(
+        self,
+        summarize: Summarizer,
+        max_tokens: int = 2000,
+        cache_size: int = 1024,
+    ):
+        self.summarize = summarize
+        self.max_tokens = max_tokens
+        self.cache_size = cache_size
+        self._summaries: OrderedDict[str, str] = OrderedDict()
+
+    @staticmethod
+    def _prefix_hashes(history: list[ChatMessage]) -> list[str]:
+        """hashes[i] 对应 history[:i] 的哈希（链式计算）"""
+        hashes = [hashlib.sha256(b"").hexdigest()]
+        for message in history:
+            raw = f"{hashes[-1]}\x00{message.role}\x00{message.content}"
+            hashes.append(hashlib.sha256(raw.encode()).hexdigest())
+        return hashes
+
+    def _split(self, history: list[ChatMessage]) -> int:
+        """返回需要保留的最近消息的起始下标"""
+        used = 0
+        start = len(history)
+        for i in range(len(history) - 1, -1, -1):
+            used += _message_tokens(history[i])
+            if used > self.max_tokens:
+                break
+            start = i
+
+        # 保留的消息必须以用户消息开头（Anthropic 等接口要求）
+        while start < len(history) and history[start].role != "user":
+            start += 1
+        return start
+
+    def _cache_get(self, key: str) -> str | None:
+        summary = self._summaries.get(key)
+        if summary is not None:
+            self._summaries.move_to_end(key)
+        return summary
+
+    def _cache_put(self, key: str, summary: str) -> None:
+        self._summaries[key] = summary
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.cache_size:
+            self._summaries.popitem(last=False)
+
+    async def prepare(self, history: list[ChatMessage]) -> tuple[list[dict], str | None]:
+        """返回 (预算内的最近消息, 更早消息的摘要)"""
+        start = self._split(history)
+        recent = [{"role": m.role, "content": m.content} for m in history[start:]]
+        if start == 0:
+            return recent, None
+
+        hashes = self._prefix_hashes(history[:start])
+        summary = self._cache_get(hashes[start])
+        if summary is not None:
+            return recent, summary
+
+        # 找到已缓存的最长前缀，只总结其后的新消息
+        base = 0
+        previous: str | None = None
+        for i in range(start - 1, 0, -1):
+            cached = self._cache_get(hashes[i])
+            if cached is not None:
+                base, previous = i, cached
+                break
+
+        pending = [{"role": m.role, "content": m.content} for m in history[base:start]]
+        try:
+            summary = await self.summarize(previous, pending)
+        except Exception:
+            logger.exception("对话历史摘要失败，仅保留最近的消息")
+            return recent, previous
+
+        self._cache_put(hashes[start], summary)
+        return recent, summary
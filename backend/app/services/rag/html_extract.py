@@ -0,0 +1,187 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# 不参与索引的页面框架标签
+BOILERPLATE_TAGS = ("script", "style", "nav", "footer", "header")
+# <template> 的内容不渲染，BeautifulSoup 的 get_text 也不返回其中的文本
+TEMPLATE_TAG = "template"
+# 正文容器的优先顺序，都不存在时使用整个文档
+CONTENT_TAGS = ("main", "article", "body")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class ExtractedPage:
+    title: str
+    text: str
+
+
+def _clean_lines(text: str) -> str:
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    return "\n".join(lines)
+
+
+def extract_soup(file_path: Path) -> ExtractedPage:
+    """BeautifulSoup 实现：构建完整的文档树"""
+    with open(file_path, encoding="utf-8") as f:
+        html_content = f.read()
+
+    soup = BeautifulSoup(html_content, "lxml")
+
+    # 提取标题
+    title = ""
+    if soup.title:
+        title = soup.title.string or ""
+    elif soup.find("h1"):
+        title = soup.find("h1").get_text(strip=True)
+
+    # 提取正文内容（移除脚本和样式）
+    for script in soup(list(BOILERPLATE_TAGS)):
+        script.decompose()
+
+    # 尝试找主要内容区域
+    main_content = soup.find("main") or soup.find("article") or soup.find("body")
+    if main_content:
+        text = main_content.get_text(separator="\n", strip=True)
+    else:
+        text = soup.get_text(separator="\n", strip=True)
+
+    return ExtractedPage(title=title, text=_clean_lines(text))
+
+
+class _TextCollector:
+    """lxml 解析器 target：边解析边收集文本，不构建文档树
+
+    与 extract_soup 的结果一致：文本节点逐个 strip 后按行拼接；样板标签和 <template>
+    内的文本丢弃；注释和处理指令会切断文本节点，但本身不计入文本；
+    正文取第一个 main / article / body 内的文本；标题取第一个 <title> 的原始文本，
+    没有 <title> 时取第一个 <h1> 的文本。
+    """
+
+    def __init__(self) -> None:
+        self._stack: list[str] = []
+        self._buffer: list[str] = []
+        self._skip_depth = 0
+        self._template_depth = 0
+        # 每种容器：(开始时的栈深度, 收集到的文本节点)；结束后深度置为 None
+        self._containers: dict[str, tuple[int | None, list[str]]] = {}
+        self._all: list[str] = []
+        self._title: list[str] | None = None
+        self._title_depth: int | None = None
+        self._h1: list[str] | None = None
+        self._h1_depth: int | None = None
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        raw = "".join(self._buffer)
+        self._buffer = []
+
+        if self._title_depth is not None:
+            self._title.append(raw)
+        if self._h1_depth is not None and not self._template_depth:
+            self._h1.append(raw.strip())
+        if self._skip_depth:
+            return
+        text = raw.strip()
+        if not text:
+            return
+        self._all.append(text)
+        for depth, texts in self._containers.values():
+            if depth is not None:
+                texts.append(text)
+
+    def start(self, tag: Any, attrib: Any) -> None:
+        self._flush()
+        if not isinstance(tag, str):
+            return
+        self._stack.append(tag)
+        depth = len(self._stack)
+        if tag == "title" and self._title is None:
+            self._title, self._title_depth = [], depth
+        elif tag == "h1" and self._h1 is None:
+            self._h1, self._h1_depth = [], depth
+        if tag == TEMPLATE_TAG:
+            self._template_depth += 1
+        if self._skip_depth:
+            self._skip_depth += 1
+        elif tag in BOILERPLATE_TAGS or tag == TEMPLATE_TAG:
+            self._skip_depth = 1
+        elif tag in CONTENT_TAGS and tag not in self._containers:
+            self._containers[tag] = (depth, [])
+
+    def end(self, tag: Any) -> None:
+        self._flush()
+        if not isinstance(tag, str) or not self._stack:
+            return
+        depth = len(self._stack)
+        self._stack.pop()
+        if self._title_depth == depth:
+            self._title_depth = None
+        if self._h1_depth == depth:
+            self._h1_depth = None
+        if tag == TEMPLATE_TAG and self._template_depth:
+            self._template_depth -= 1
+        if self._skip_depth:
+            self._skip_depth -= 1
+        container = self._containers.get(tag)
+        if container is not None and container[0] == depth:
+            self._containers[tag] = (None, container[1])
+
+    def data(self, data: str) -> None:
+        self._buffer.append(data)
+
+    def comment(self, text: str) -> None:
+        self._flush()
+
+    def pi(self, target: str, data: str | None = None) -> None:
+        self._flush()
+
+    def close(self) -> ExtractedPage:
+        self._flush()
+        if self._title is not None:
+            title = "".join(self._title)
+        elif self._h1 is not None:
+            title = "".join(self._h1)
+        else:
+            title = ""
+
+        texts = self._all
+        for tag in CONTENT_TAGS:
+            if tag in self._containers:
+                texts = self._containers[tag][1]
+                break
+        return ExtractedPage(title=title, text=_clean_lines("\n".join(texts)))
+
+
+def extract_streaming(file_path: Path) -> ExtractedPage:
+    """lxml 流式实现：分块读取文件交给解析器，由 target 回调收集文本"""
+    collector = _TextCollector()
+    parser = etree.HTMLParser(target=collector)
+    with open(file_path, encoding="utf-8") as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            parser.feed(chunk)
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        # 空文件没有任何元素，lxml 会报错；extract_soup 对同样的输入返回空页面
+        return collector.close()
+
+
+EXTRACTORS: dict[str, Callable[[Path], ExtractedPage]] = {
+    "soup": extract_soup,
+    "lxml": extract_streaming,
+}
+
+
+def get_extractor(name: str) -> Callable[[Path], ExtractedPage]:
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"未知的 HTML 提取器: {name}") from None
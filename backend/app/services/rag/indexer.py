@@ -2,16 +2,18 @@ import hashlib
 from pathlib import Path
 from typing import Any
 
-from bs4 import BeautifulSoup
-
+from app.core.config import get_settings
+from app.services.rag.dedup import NearDuplicateIndex, find_boilerplate_lines
+from app.services.rag.html_extract import get_extractor
 from app.services.rag.vector_store import VectorStore, get_vector_store
 
 
 class ContentIndexer:
     """网站内容索引器"""
 
-    def __init__(self, vector_store: VectorStore | None = None):
+    def __init__(self, vector_store: VectorStore | None = None, extractor: str | None = None):
         self.vector_store = vector_store or get_vector_store()
+        self.extract = get_extractor(extractor or get_settings().html_extractor)
 
     def _generate_id(self, content: str, url: str) -> str:
         """生成文档 ID"""
@@ -32,37 +34,26 @@ class ContentIndexer:
 
         return [c for c in chunks if c]
 
-    def index_html_file(self, file_path: Path, base_url: str = "") -> int:
+    def index_html_file(
+        self, file_path: Path, base_url: str = "", collection_name: str | None = None
+    ) -> int:
         """索引单个 HTML 文件"""
-        with open(file_path, encoding="utf-8") as f:
-            html_content = f.read()
-
-        soup = BeautifulSoup(html_content, "lxml")
-
-        # 提取标题
-        title = ""
-        if soup.title:
-            title = soup.title.string or ""
-        elif soup.find("h1"):
-            title = soup.find("h1").get_text(strip=True)
-
-        # 提取正文内容（移除脚本和样式）
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-
-        # 尝试找主要内容区域
-        main_content = soup.find("main") or soup.find("article") or soup.find("body")
-        if main_content:
-            text = main_content.get_text(separator="\n", strip=True)
-        else:
-            text = soup.get_text(separator="\n", strip=True)
-
-        # 清理文本
-        lines = [line.strip() for line in text.split("\n") if line.strip()]
-        text = "\n".join(lines)
-
+        page = self.extract(file_path)
+        indexed, _ = self._index_page(file_path, page.title, page.text, base_url, collection_name)
+        return indexed
+
+    def _index_page(
+        self,
+        file_path: Path,
+        title: str,
+        text: str,
+        base_url: str,
+        collection_name: str | None,
+        duplicates: NearDuplicateIndex | None = None,
+    ) -> tuple[int, int]:
+        """分块并写入向量库，返回（写入的块数，因近似重复跳过的块数）"""
         if not text:
-            return 0
+            return 0, 0
 
         # 构建 URL
         url = base_url + "/" + file_path.name if base_url else file_path.name
@@ -73,8 +64,13 @@ class ContentIndexer:
         documents = []
         metadatas: list[dict[str, Any]] = []
         ids = []
+        skipped = 0
 
         for i, chunk in enumerate(chunks):
+            # 语料中已有近似的块（通常是侧栏、课程列表等重复区块）时只保留第一次出现的
+            if duplicates is not None and duplicates.seen(chunk):
+                skipped += 1
+                continue
             doc_id = self._generate_id(chunk, f"{url}#{i}")
             documents.append(chunk)
             metadatas.append({"title": title, "url": url, "chunk_index": i})
@@ -85,24 +81,62 @@ class ContentIndexer:
                 documents=documents,
                 metadatas=metadatas,
                 ids=ids,
+                collection_name=collection_name,
             )
 
-        return len(documents)
+        return len(documents), skipped
+
+    def index_directory(
+        self, directory: Path, base_url: str = "", collection_name: str | None = None
+    ) -> dict[str, int]:
+        """索引目录下的所有 HTML 文件
 
-    def index_directory(self, directory: Path, base_url: str = "") -> dict[str, int]:
-        """索引目录下的所有 HTML 文件"""
-        stats = {"files": 0, "chunks": 0}
+        启用去重时先提取全部页面：在大部分页面中重复出现的行视为样板文本并删除，
+        分块后与语料中已索引的块近似重复（SimHash）的块只嵌入一次。
+        """
+        settings = get_settings()
+        stats = {"files": 0, "chunks": 0, "duplicate_chunks": 0, "boilerplate_lines": 0}
 
         html_files = list(directory.glob("**/*.html"))
 
-        for html_file in html_files:
-            chunks_count = self.index_html_file(html_file, base_url)
+        if not settings.index_dedup:
+            for html_file in html_files:
+                chunks_count = self.index_html_file(html_file, base_url, collection_name)
+                stats["files"] += 1
+                stats["chunks"] += chunks_count
+            return stats
+
+        pages = [(html_file, self.extract(html_file)) for html_file in html_files]
+        boilerplate = find_boilerplate_lines(
+            [page.text.split("\n") for _, page in pages], settings.index_boilerplate_ratio
+        )
+        duplicates = NearDuplicateIndex(settings.index_near_duplicate_distance)
+
+        for html_file, page in pages:
+            lines = page.text.split("\n")
+            kept = [line for line in lines if line not in boilerplate]
+            indexed, skipped = self._index_page(
+                html_file, page.title, "\n".join(kept), base_url, collection_name, duplicates
+            )
             stats["files"] += 1
-            stats["chunks"] += chunks_count
+            stats["chunks"] += indexed
+            stats["duplicate_chunks"] += skipped
+            stats["boilerplate_lines"] += len(lines) - len(kept)
 
         return stats
 
     def reindex_all(self, directory: Path, base_url: str = "") -> dict[str, int]:
-        """重新索引所有内容"""
-        self.vector_store.delete_all()
-        return self.index_directory(directory, base_url)
+        """重新索引所有内容
+
+        写入新的影子 collection，校验通过后再切换；重建期间搜索仍使用旧的完整索引。
+        校验失败时丢弃影子 collection 并抛出 IndexValidationError。
+        """
+        name = self.vector_store.create_version()
+        try:
+            stats = self.index_directory(directory, base_url, collection_name=name)
+            self.vector_store.validate_version(name, stats["chunks"])
+        except Exception:
+            self.vector_store.drop_version(name)
+            raise
+        self.vector_store.activate_version(name)
+        return stats
@@ -1,88 +1,373 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import chromadb
+from chromadb.api.shared_system_client import SharedSystemClient
 
 from app.core.config import get_settings
+from app.core.metrics import RAG_STAGE_SECONDS
 from app.services.rag.embeddings import get_embedding_service
+from app.services.singleflight import SingleFlight, make_key
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 开发环境只运行单个进程
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 持久化目录中的索引状态（版本号、当前 collection）和写锁文件
+STATE_FILE = "index_state.json"
+LOCK_FILE = ".write.lock"
+# 校验新版本时，样本文档须出现在自身向量查询的前 N 个结果中（或最近邻距离约为 0）
+SMOKE_QUERY_RESULTS = 10
+SMOKE_MAX_DISTANCE = 1e-4
+
+
+class IndexValidationError(Exception):
+    """新建的索引版本未通过校验，不会被切换为当前版本"""
+
+
+@dataclass
+class IndexState:
+    version: int = 0
+    active: str = "site_content"
+    # 上一个版本，用于回滚；下一次切换时被回收
+    previous: str | None = None
 
 
 class VectorStore:
-    """ChromaDB 向量存储服务"""
+    """ChromaDB 向量存储服务
+
+    多个 worker 进程共享同一个持久化目录：写入时持有跨进程文件锁，写完后递增
+    index_state.json 中的版本号；每个进程查询前（最多每 reload_interval 秒）检查版本号，
+    发现其他进程写入过就在共享锁下重新打开客户端，加载最新的索引。旧的 chromadb System
+    （sqlite 连接和内存中的 HNSW 段）在最后一个使用它的查询结束后停止。
+
+    重建索引时写入新的版本化 collection（site_content_v{时间戳}），校验通过后
+    原子地修改状态文件中的 active 指针，搜索始终使用完整的索引。
+    """
 
     COLLECTION_NAME = "site_content"
 
-    def __init__(self, persist_dir: str):
+    def __init__(self, persist_dir: str, coalesce: bool = True, reload_interval: float = 1.0):
+        self.persist_dir = Path(persist_dir)
         # 确保目录存在
-        Path(persist_dir).mkdir(parents=True, exist_ok=True)
-        self.client = chromadb.PersistentClient(path=persist_dir)
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
         self.embedding_service = get_embedding_service()
-        self.collection = self.client.get_or_create_collection(
-            name=self.COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"},
-        )
+        self.coalesce = coalesce
+        self.reload_interval = reload_interval
+        self._search_flight: SingleFlight[list[dict[str, Any]]] = SingleFlight()
+        self._thread_lock = threading.Lock()
+        # 正在查询的 System -> 查询数；被替换的 System 在计数归零后停止
+        self._lease_lock = threading.Lock()
+        self._leases: dict[Any, int] = {}
+        self._checked_at = time.monotonic()
+        self.state = self._read_state()
+        self.client, self.collection = self._open(self.state.active)
+        self._system = self.client._system
+
+    def _open(self, name: str) -> tuple[Any, Any]:
+        client = chromadb.PersistentClient(path=str(self.persist_dir))
+        return client, self._get_collection(client, name)
+
+    @staticmethod
+    def _get_collection(client: Any, name: str) -> Any:
+        return client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+
+    def _read_state(self) -> IndexState:
+        try:
+            data = json.loads((self.persist_dir / STATE_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            return IndexState(active=self.COLLECTION_NAME)
+        return IndexState(**data)
+
+    def _write_state(self, state: IndexState) -> None:
+        tmp = self.persist_dir / f".{STATE_FILE}.{os.getpid()}"
+        tmp.write_text(json.dumps(asdict(state)))
+        os.replace(tmp, self.persist_dir / STATE_FILE)
+
+    def _reload(self, state: IndexState) -> None:
+        """重新打开客户端（调用方持有 _thread_lock 和跨进程文件锁）"""
+        # chromadb 按路径缓存 System，移出缓存后才会从磁盘重新加载
+        identifier = self.client._identifier
+        SharedSystemClient._identifier_to_system.pop(identifier, None)
+        getattr(SharedSystemClient, "_identifier_to_refcount", {}).pop(identifier, None)
+
+        old_system = self._system
+        client, collection = self._open(state.active)
+        with self._lease_lock:
+            self.client, self.collection = client, collection
+            self._system = client._system
+            idle = old_system not in self._leases
+        self.state = state
+        if idle:
+            old_system.stop()
+
+    def _reload_if_changed(self) -> None:
+        """其他进程写入后，内存中的 HNSW 索引已过期，需要重新打开"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        state = self._read_state()
+        if state.version == self.state.version:
+            return
+        with self._thread_lock:
+            if state.version == self.state.version:
+                return
+            # 共享锁：不在其他进程写入的过程中打开索引
+            with self._file_lock(exclusive=False):
+                self._reload(self._read_state())
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """跨进程文件锁：写入持有排他锁，重新加载持有共享锁"""
+        with (self.persist_dir / LOCK_FILE).open("a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _reading(self) -> Iterator[tuple[Any, Any]]:
+        """查询期间占用当前 System，返回当前的 (client, collection)"""
+        self._reload_if_changed()
+        with self._lease_lock:
+            system, client, collection = self._system, self.client, self.collection
+            self._leases[system] = self._leases.get(system, 0) + 1
+        try:
+            yield client, collection
+        finally:
+            with self._lease_lock:
+                self._leases[system] -= 1
+                retired = self._leases[system] == 0 and system is not self._system
+                if self._leases[system] == 0:
+                    del self._leases[system]
+            if retired:
+                system.stop()
+
+    @contextmanager
+    def _writing(self, bump: bool = True) -> Iterator[IndexState]:
+        """跨进程串行化写入，写入前加载最新索引，写入后递增版本号
+
+        只写影子 collection 时 bump=False：正在服务的索引没有变化，其他进程无需重新加载。
+        """
+        with self._thread_lock, self._file_lock(exclusive=True):
+            state = self._read_state()
+            if state.version != self.state.version:
+                self._reload(state)
+            yield state
+            if bump:
+                state.version += 1
+                self._write_state(state)
+                self.state = state
 
     def add_documents(
         self,
         documents: list[str],
         metadatas: list[dict[str, Any]],
         ids: list[str],
+        collection_name: str | None = None,
     ) -> None:
-        """添加文档到向量存储"""
+        """添加文档到向量存储（指定 collection_name 时写入该影子 collection）"""
         embeddings = self.embedding_service.embed(documents)
-        self.collection.add(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids,
-        )
+        with self._writing(bump=collection_name is None):
+            collection = (
+                self.collection
+                if collection_name is None
+                else self._get_collection(self.client, collection_name)
+            )
+            collection.add(
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids,
+            )
 
     def search(self, query: str, limit: int = 5) -> list[dict[str, Any]]:
         """搜索相似文档"""
-        query_embedding = self.embedding_service.embed_query(query)
+        with RAG_STAGE_SECONDS.time("embed_query"):
+            query_embedding = self.embedding_service.embed_query(query)
 
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=limit,
-            include=["documents", "metadatas", "distances"],
-        )
+        with self._reading() as (_, collection), RAG_STAGE_SECONDS.time("collection.query"):
+            results = collection.query(
+                query_embeddings=[query_embedding],
+                n_results=limit,
+                include=["documents", "metadatas", "distances"],
+            )
 
-        if not results["documents"] or not results["documents"][0]:
+        return _format_results(results, 0)
+
+    def search_many(self, queries: list[tuple[str, int]]) -> list[list[dict[str, Any]]]:
+        """批量搜索：一次嵌入所有查询，一次多向量查询，结果与 queries 顺序一致
+
+        queries 为 (查询, 返回数量)；按最大的数量查询后再截断到各自的数量。
+        """
+        if not queries:
             return []
 
-        search_results = []
-        for i, doc in enumerate(results["documents"][0]):
-            metadata = results["metadatas"][0][i] if results["metadatas"] else {}
-            distance = results["distances"][0][i] if results["distances"] else 0
-            # Convert distance to similarity score (cosine distance -> similarity)
-            score = 1 - distance
-
-            search_results.append(
-                {
-                    "content": doc,
-                    "title": metadata.get("title", ""),
-                    "url": metadata.get("url", ""),
-                    "score": score,
-                }
+        with RAG_STAGE_SECONDS.time("embed_query_batch"):
+            query_embeddings = self.embedding_service.embed_queries([q for q, _ in queries])
+
+        with (
+            self._reading() as (_, collection),
+            RAG_STAGE_SECONDS.time("collection.query_batch"),
+        ):
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=max(limit for _, limit in queries),
+                include=["documents", "metadatas", "distances"],
             )
 
-        return search_results
+        return [_format_results(results, i)[:limit] for i, (_, limit) in enumerate(queries)]
 
-    def delete_all(self) -> None:
-        """清空所有文档"""
-        self.client.delete_collection(self.COLLECTION_NAME)
-        self.collection = self.client.get_or_create_collection(
-            name=self.COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"},
+    async def search_async(self, query: str, limit: int = 5) -> list[dict[str, Any]]:
+        """异步搜索：在线程中执行，相同的并发查询只执行一次"""
+        if not self.coalesce:
+            return await asyncio.to_thread(self.search, query, limit)
+
+        return await self._search_flight.do(
+            make_key(query, limit),
+            lambda: asyncio.to_thread(self.search, query, limit),
         )
 
+    async def search_many_async(self, queries: list[tuple[str, int]]) -> list[list[dict[str, Any]]]:
+        """异步批量搜索：在线程中执行"""
+        return await asyncio.to_thread(self.search_many, queries)
+
+    def delete_all(self) -> None:
+        """清空当前 collection 的所有文档（重建索引请使用影子 collection）"""
+        with self._writing() as state:
+            self.client.delete_collection(state.active)
+            self.collection = self._get_collection(self.client, state.active)
+
     def count(self) -> int:
         """返回文档数量"""
-        return self.collection.count()
+        with self._reading() as (_, collection):
+            return collection.count()
+
+    # --- 版本化 collection ---
+
+    def create_version(self) -> str:
+        """创建一个空的影子 collection，返回其名称"""
+        name = f"{self.COLLECTION_NAME}_v{time.time_ns()}"
+        with self._writing(bump=False):
+            self._get_collection(self.client, name)
+        return name
+
+    def validate_version(self, name: str, expected_count: int) -> None:
+        """校验影子 collection：文档数与写入的一致，且能通过冒烟查询检索到自身"""
+        with self._reading() as (client, _):
+            self._validate_collection(client.get_collection(name), expected_count)
+
+    @staticmethod
+    def _validate_collection(collection: Any, expected_count: int) -> None:
+        name = collection.name
+        count = collection.count()
+        if count == 0 or count != expected_count:
+            raise IndexValidationError(f"{name}: 文档数 {count}，预期 {expected_count}")
+
+        # 用第一篇文档自身的向量查询：它应当在前几个结果中，或最近邻与它的向量相同
+        # （内容相同的文档向量相同，排在第一位的不一定是它）
+        sample = collection.get(limit=1, include=["embeddings"])
+        results = collection.query(
+            query_embeddings=sample["embeddings"],
+            n_results=min(SMOKE_QUERY_RESULTS, count),
+            include=["distances"],
+        )
+        ids = results["ids"][0] if results["ids"] else []
+        distances = results["distances"][0] if results["distances"] else []
+        if sample["ids"][0] not in ids and not (distances and distances[0] <= SMOKE_MAX_DISTANCE):
+            raise IndexValidationError(f"{name}: 冒烟查询未返回预期文档")
+
+    def activate_version(self, name: str) -> None:
+        """原子地切换当前 collection，旧版本保留用于回滚，更早的版本被回收"""
+        with self._writing() as state:
+            if name == state.active:
+                return
+            self.collection = self.client.get_collection(name)
+            state.previous, state.active = state.active, name
+            self._collect_garbage(state)
+        logger.info("向量索引已切换到 %s（上一版本 %s）", name, state.previous)
+
+    def drop_version(self, name: str) -> None:
+        """删除未被使用的影子 collection（例如校验失败时）"""
+        with self._writing(bump=False) as state:
+            if name not in (state.active, state.previous):
+                self.client.delete_collection(name)
+
+    def rollback(self) -> str:
+        """切回上一个版本，返回切换后的 collection 名称"""
+        with self._writing() as state:
+            if state.previous is None:
+                raise IndexValidationError("没有可回滚的版本")
+            self.collection = self.client.get_collection(state.previous)
+            state.active, state.previous = state.previous, state.active
+        logger.info("向量索引已回滚到 %s", state.active)
+        return state.active
+
+    def _collect_garbage(self, state: IndexState) -> None:
+        """删除比当前版本更早且不是回滚版本的 collection（更新的可能正在构建）"""
+        for collection in self.client.list_collections():
+            name = getattr(collection, "name", collection)
+            if (
+                name.startswith(self.COLLECTION_NAME)
+                and name not in (state.active, state.previous)
+                and _version_key(name) < _version_key(state.active)
+            ):
+                self.client.delete_collection(name)
+                logger.info("已回收旧的向量索引 %s", name)
+
+
+def _format_results(results: Any, index: int) -> list[dict[str, Any]]:
+    """collection.query 结果中第 index 个查询的命中"""
+    if not results["documents"] or not results["documents"][index]:
+        return []
+
+    search_results = []
+    for i, doc in enumerate(results["documents"][index]):
+        metadata = results["metadatas"][index][i] if results["metadatas"] else {}
+        distance = results["distances"][index][i] if results["distances"] else 0
+        # Convert distance to similarity score (cosine distance -> similarity)
+        score = 1 - distance
+
+        search_results.append(
+            {
+                "content": doc,
+                "title": metadata.get("title", ""),
+                "url": metadata.get("url", ""),
+                "score": score,
+            }
+        )
+
+    return search_results
+
+
+def _version_key(name: str) -> int:
+    """site_content_v{time_ns} 的时间戳；未版本化的旧 collection 视为最早"""
+    _, sep, suffix = name.rpartition("_v")
+    return int(suffix) if sep and suffix.isdigit() else 0
 
 
 @lru_cache
 def get_vector_store() -> VectorStore:
     settings = get_settings()
-    return VectorStore(persist_dir=settings.chroma_persist_dir)
+    return VectorStore(
+        persist_dir=settings.chroma_persist_dir,
+        coalesce=settings.request_coalescing,
+        reload_interval=settings.vector_store_reload_interval,
+    )
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+from typing import Any
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth_cache import TTLCache
+from app.core.config import get_settings
+from app.services.snapshots import get_snapshot_publisher
+
+# 文章列表总数缓存：筛选条件 -> 总数；分类和标签来自查询参数，必须限制条目数
+COUNT_CACHE_TTL = 60.0
+COUNT_CACHE_SIZE = 1024
+list_total_cache: TTLCache[str, int] = TTLCache(COUNT_CACHE_SIZE, COUNT_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """序列化后的响应体及其校验器"""
+
+    body: bytes
+    etag: str
+    last_modified: datetime | None = None
+
+
+def make_etag(*parts: Any) -> str:
+    """由 id、updated_at 等版本信息生成强 ETag"""
+    raw = json.dumps(parts, default=str, separators=(",", ":")).encode()
+    return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+
+def _http_date(value: datetime) -> datetime:
+    # SQLite 的 func.now() 存储不带时区的 UTC 时间；HTTP 日期精确到秒
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.astimezone(UTC).replace(microsecond=0)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    """按 RFC 9110 判断条件请求：有 If-None-Match 时忽略 If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match 使用弱比较
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    return _http_date(last_modified) <= since
+
+
+def conditional_response(request: Request, cached: CachedResponse, cache_control: str) -> Response:
+    """返回 304 或完整的 JSON 响应，并附带缓存相关的响应头"""
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": cache_control,
+        # 管理员与匿名读者看到的内容不同，共享缓存需要按 Authorization 区分
+        "Vary": "Authorization",
+    }
+    if cached.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_http_date(cached.last_modified), usegmt=True)
+
+    if is_not_modified(request, cached.etag, cached.last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+def public_cache_control() -> str:
+    return f"public, max-age={get_settings().article_cache_max_age}"
+
+
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+class ResponseCache:
+    """公开响应的进程内 LRU 缓存，本进程写入数据时整体失效
+
+    clear() 会增加 generation；读取开始前记录 generation，
+    写回时若已变化则丢弃，避免与写入并发的读取把旧数据放回缓存。
+    其他 worker 的写入不会通知本进程，条目最多保留 ttl 秒；
+    读取走有延迟的只读副本时，写入后 fill_delay 秒内不写回缓存，避免缓存副本上的旧数据。
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 30.0, fill_delay: float = 0.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.fill_delay = fill_delay
+        # key -> (过期时间, 响应)
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self._cleared_at = -math.inf
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        params = sorted(request.query_params.multi_items())
+        return f"{request.url.path}?{urlencode(params)}"
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: CachedResponse, generation: int) -> None:
+        if generation != self.generation:
+            return
+        now = time.monotonic()
+        if now < self._cleared_at + self.fill_delay:
+            return
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._cleared_at = time.monotonic()
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+@lru_cache
+def get_article_cache() -> ResponseCache:
+    settings = get_settings()
+    return ResponseCache(
+        max_size=settings.article_cache_size,
+        ttl=settings.article_cache_ttl,
+        fill_delay=settings.article_cache_replica_lag if settings.database_read_url else 0.0,
+    )
+
+
+def _clear_article_caches() -> None:
+    list_total_cache.clear()
+    get_article_cache().clear()
+
+
+def _after_commit(session: object) -> None:
+    _clear_article_caches()
+    publisher = get_snapshot_publisher()
+    if publisher is not None:
+        publisher.schedule()
+
+
+def invalidate_article_caches(db: AsyncSession) -> None:
+    """文章写入后清空列表总数和响应缓存
+
+    会话提交后再清空一次，避免写入与提交之间的读取把旧数据放回缓存；
+    提交后同时重新发布静态快照。
+    """
+    _clear_article_caches()
+    event.listen(db.sync_session, "after_commit", _after_commit, once=True)
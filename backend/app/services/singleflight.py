@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import json
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from typing import Any
+
+
+def make_key(*parts: Any) -> str:
+    """根据请求参数生成合并用的 key"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class SingleFlight[T]:
+    """合并相同 key 的并发调用：第一个调用者执行，其余调用者等待同一结果"""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Future[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        # shield: 单个调用者取消不影响其他等待者
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future[T]) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+
+class _Broadcast[T]:
+    """单个上游流的广播：缓存已产生的片段，后加入的订阅者从头开始接收"""
+
+    def __init__(self, source: AsyncIterator[T]) -> None:
+        self.items: list[T] = []
+        self.done = False
+        self.cancelled = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[T]) -> None:
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncGenerator[T, None]:
+        self.subscribers += 1
+        try:
+            index = 0
+            while True:
+                if index < len(self.items):
+                    yield self.items[index]
+                    index += 1
+                    continue
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            # 所有订阅者都离开时，停止上游生成
+            if self.subscribers == 0 and not self.done:
+                self.cancelled = True
+                self.task.cancel()
+
+
+class StreamSingleFlight[T]:
+    """流式版本的 SingleFlight：相同 key 的并发请求共享同一个上游流"""
+
+    def __init__(self) -> None:
+        self._streams: dict[str, _Broadcast[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def stream(self, key: str, factory: Callable[[], AsyncIterator[T]]) -> AsyncGenerator[T, None]:
+        broadcast = self._streams.get(key)
+        if broadcast is None or broadcast.cancelled or broadcast.task.done():
+            broadcast = _Broadcast(factory())
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._forget(key, broadcast))
+        return broadcast.subscribe()
+
+    def _forget(self, key: str, broadcast: _Broadcast[T]) -> None:
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
@@ -0,0 +1,224 @@
+import asyncio
+import contextlib
+import gzip
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import IO
+from urllib.parse import quote
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.models import Article, User
+from app.schemas.article import ArticleBriefResponse, ArticleListResponse, ArticleResponse
+from app.services.articles import BRIEF_COLUMNS, encode_cursor
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli 是可选依赖
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 开发环境只运行单个进程
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 未按分类/标签筛选时使用的目录名
+ALL = "_all"
+CURRENT = "current"
+# 多个 worker 共用快照目录，发布时持有该文件锁
+LOCK_FILE = ".publish.lock"
+
+
+@dataclass
+class PublishResult:
+    version: str
+    files: int
+    seconds: float
+
+
+def _list_pages(items: list[ArticleBriefResponse], page_size: int) -> list[bytes]:
+    """与 list_articles 相同的分页结果（第 1 页总是存在，即使为空）"""
+    pages = []
+    for start in range(0, max(len(items), 1), page_size):
+        page_items = items[start : start + page_size]
+        next_cursor = None
+        if start + page_size < len(items):
+            last = page_items[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        body = ArticleListResponse(
+            items=page_items,
+            total=len(items),
+            page=start // page_size + 1,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        ).model_dump_json()
+        pages.append(body.encode())
+    return pages
+
+
+def _write(path: Path, body: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    # nginx gzip_static / brotli_static 直接发送预压缩文件
+    (path.parent / (path.name + ".gz")).write_bytes(gzip.compress(body, 9, mtime=0))
+    if brotli is not None:
+        (path.parent / (path.name + ".br")).write_bytes(brotli.compress(body))
+
+
+class SnapshotPublisher:
+    """把已发布文章导出为静态 JSON，供 nginx 通过 try_files 直接返回
+
+    目录结构（相对于 root/current）：
+        articles/{slug}.json                    GET /api/articles/{slug}
+        lists/{category}/{tag}/page-{n}.json    GET /api/articles?page=n&category=&tag=
+    未筛选的分类或标签使用 "_all"。每次发布写入新的版本目录，
+    然后原子地替换 current 符号链接，旧版本保留 keep_versions 个。
+    进程内用 asyncio.Lock、进程间用文件锁串行发布。
+    """
+
+    def __init__(self, root: Path, page_size: int = 10, keep_versions: int = 2):
+        self.root = root
+        self.page_size = page_size
+        self.keep_versions = max(1, keep_versions)
+        self._dirty = False
+        self._task: asyncio.Task[None] | None = None
+        # 串行发布，保证 current 总是指向最新的版本
+        self._lock = asyncio.Lock()
+        self.last_result: PublishResult | None = None
+
+    def schedule(self) -> None:
+        """请求重新发布；连续的写入合并为一次发布"""
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            try:
+                await self.publish()
+            except Exception:
+                logger.exception("静态快照发布失败")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+    async def publish(self) -> PublishResult:
+        async with self._lock:
+            lock_file = await asyncio.to_thread(self._lock_file)
+            try:
+                return await self._publish()
+            finally:
+                lock_file.close()
+
+    def _lock_file(self) -> IO[str]:
+        """阻塞直到取得跨进程发布锁；关闭返回的文件即释放"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_file = (self.root / LOCK_FILE).open("a")
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    async def _publish(self) -> PublishResult:
+        started = time.monotonic()
+        async with async_session_maker() as db:
+            brief_rows = (
+                (
+                    await db.execute(
+                        select(
+                            *BRIEF_COLUMNS,
+                            User.name.label("author_name"),
+                        )
+                        .join(User, Article.author_id == User.id)
+                        .where(Article.status == "published")
+                        .order_by(Article.created_at.desc(), Article.id.desc())
+                    )
+                )
+                .mappings()
+                .all()
+            )
+            articles = (
+                (
+                    await db.execute(
+                        select(Article)
+                        .options(selectinload(Article.author))
+                        .where(Article.status == "published")
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            article_bodies = {
+                article.slug: ArticleResponse.model_validate(article).model_dump_json().encode()
+                for article in articles
+            }
+
+        items = [ArticleBriefResponse.model_validate(dict(row)) for row in brief_rows]
+
+        groups: dict[tuple[str, str], list[ArticleBriefResponse]] = {(ALL, ALL): items}
+        for item in items:
+            groups.setdefault((quote(item.category, safe=""), ALL), []).append(item)
+            for tag in item.tags:
+                groups.setdefault((ALL, quote(tag, safe="")), []).append(item)
+
+        files: dict[str, bytes] = {}
+        for slug, body in article_bodies.items():
+            # nginx 的 $uri 已解码，文件名直接使用 slug；含路径分隔符的交给 API
+            if "/" not in slug and not slug.startswith("."):
+                files[f"articles/{slug}.json"] = body
+        for (category, tag), group in groups.items():
+            for number, body in enumerate(_list_pages(group, self.page_size), 1):
+                files[f"lists/{category}/{tag}/page-{number}.json"] = body
+
+        version = f"v{time.time_ns()}"
+        await asyncio.to_thread(self._write_version, version, files)
+        result = PublishResult(
+            version=version,
+            files=len(files),
+            seconds=time.monotonic() - started,
+        )
+        self.last_result = result
+        logger.info("静态快照已发布: %s（%d 个文件）", version, len(files))
+        return result
+
+    def _write_version(self, version: str, files: dict[str, bytes]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".{version}"
+        for relative, body in files.items():
+            _write(staging / relative, body)
+        staging.rename(self.root / version)
+
+        # 相对链接，nginx 容器挂载到其他路径时仍然有效
+        link = self.root / f".{CURRENT}-{version}"
+        link.symlink_to(version)
+        os.replace(link, self.root / CURRENT)
+
+        versions = sorted(p for p in self.root.glob("v*") if p.is_dir())
+        for old in versions[: -self.keep_versions]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+@lru_cache
+def get_snapshot_publisher() -> SnapshotPublisher | None:
+    """未配置 SNAPSHOT_DIR 时返回 None"""
+    settings = get_settings()
+    if not settings.snapshot_dir:
+        return None
+    return SnapshotPublisher(
+        root=Path(settings.snapshot_dir),
+        page_size=settings.snapshot_page_size,
+        keep_versions=settings.snapshot_keep_versions,
+    )
@@ -0,0 +1,151 @@
+import asyncio
+import json
+from collections.abc import AsyncGenerator, AsyncIterable, Callable
+from contextlib import suppress
+from typing import Any
+
+from starlette.types import Receive
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 是可选依赖
+    orjson = None
+
+HEARTBEAT_FRAME = ": ping\n\n"
+DONE_FRAME = "data: [DONE]\n\n"
+
+_TIMEOUT = object()
+_STOPPED = object()
+
+
+def dumps(data: Any) -> str:
+    """JSON 序列化，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def sse_event(data: Any) -> str:
+    """构建一个 SSE data 帧"""
+    return f"data: {dumps(data)}\n\n"
+
+
+class _Puller[T]:
+    """带超时地从异步迭代器中取下一项，超时不会丢失正在进行的读取"""
+
+    def __init__(self, source: AsyncIterable[T]) -> None:
+        self._iterator = aiter(source)
+        self._pending: asyncio.Future[T] | None = None
+
+    async def next(
+        self, timeout: float | None, stop: asyncio.Future[Any] | None = None
+    ) -> T | object:
+        """返回下一项，超时返回 _TIMEOUT，stop 先完成时返回 _STOPPED；
+        迭代结束时抛出 StopAsyncIteration"""
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(anext(self._iterator))
+        waiters: set[asyncio.Future[Any]] = {self._pending}
+        if stop is not None:
+            waiters.add(stop)
+        done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if self._pending not in done:
+            return _STOPPED if stop is not None and stop in done else _TIMEOUT
+        pending, self._pending = self._pending, None
+        return pending.result()
+
+    async def aclose(self) -> None:
+        if self._pending is not None:
+            self._pending.cancel()
+            with suppress(BaseException):
+                await self._pending
+        aclose = getattr(self._iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def coalesce(
+    chunks: AsyncIterable[str],
+    max_delay: float = 0.02,
+    max_bytes: int = 512,
+) -> AsyncGenerator[str, None]:
+    """合并细碎的增量：第一段缓冲满 max_delay 秒，或缓冲超过 max_bytes 时一起输出"""
+    loop = asyncio.get_running_loop()
+    puller = _Puller(chunks)
+    buffer: list[str] = []
+    size = 0
+    deadline: float | None = None
+
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                chunk = await puller.next(timeout)
+            except StopAsyncIteration:
+                break
+
+            if chunk is not _TIMEOUT:
+                buffer.append(chunk)
+                size += len(chunk.encode())
+                if deadline is None:
+                    deadline = loop.time() + max_delay
+
+            expired = deadline is not None and loop.time() >= deadline
+            if buffer and (size >= max_bytes or expired):
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        await puller.aclose()
+
+
+async def with_heartbeat(
+    frames: AsyncIterable[str],
+    interval: float = 15.0,
+) -> AsyncGenerator[str, None]:
+    """空闲超过 interval 秒时发送 SSE 注释帧，避免代理缓冲或断开空闲连接"""
+    puller = _Puller(frames)
+    try:
+        while True:
+            try:
+                frame = await puller.next(interval)
+            except StopAsyncIteration:
+                return
+            yield HEARTBEAT_FRAME if frame is _TIMEOUT else frame
+    finally:
+        await puller.aclose()
+
+
+async def _wait_for_disconnect(receive: Receive) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def until_disconnected(
+    frames: AsyncIterable[str],
+    receive: Receive,
+    on_disconnect: Callable[[], None] | None = None,
+) -> AsyncGenerator[str, None]:
+    """客户端断开后立即停止输出，并关闭上游生成器链（取消 LLM 流）
+
+    不依赖下一次写入失败来发现断开，也不依赖服务器的 ASGI 版本。
+    """
+    watcher = asyncio.ensure_future(_wait_for_disconnect(receive))
+    puller = _Puller(frames)
+    try:
+        while True:
+            try:
+                frame = await puller.next(None, stop=watcher)
+            except StopAsyncIteration:
+                return
+            if frame is _STOPPED:
+                if on_disconnect is not None:
+                    on_disconnect()
+                return
+            yield frame
+    finally:
+        watcher.cancel()
+        await puller.aclose()
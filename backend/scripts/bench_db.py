@@ -0,0 +1,117 @@
+"""Compare SQLite read/write throughput with and without the engine profile.
+
+Usage:
+    uv run python scripts/bench_db.py [--seconds 10] [--readers 16] [--writers 4]
+
+Each run uses a fresh database file. Writers insert and update articles in
+short transactions like the admin endpoints; readers run the article list
+query. The "default" profile is a plain create_async_engine, the "tuned"
+profile is app.core.database.create_db_engine (WAL, busy_timeout, ...).
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.database import Base, create_db_engine  # noqa: E402
+from app.models import Article, User  # noqa: E402
+
+
+async def _writer(maker: async_sessionmaker, stop: float, stats: dict[str, int]) -> None:
+    while time.monotonic() < stop:
+        try:
+            async with maker() as session, session.begin():
+                article_id = str(uuid.uuid4())
+                await session.execute(select(Article.id).where(Article.slug == article_id))
+                await session.execute(
+                    insert(Article).values(
+                        id=article_id,
+                        slug=article_id,
+                        title="bench",
+                        excerpt="bench",
+                        content="body " * 200,
+                        tags="[]",
+                        status="published",
+                        author_id="bench",
+                    )
+                )
+                await session.execute(
+                    update(Article).where(Article.id == article_id).values(title="bench 2")
+                )
+            stats["writes"] += 1
+        except OperationalError:
+            stats["write_errors"] += 1
+
+
+async def _reader(maker: async_sessionmaker, stop: float, stats: dict[str, int]) -> None:
+    query = (
+        select(Article.id, Article.title, Article.excerpt, User.name)
+        .join(User, Article.author_id == User.id)
+        .where(Article.status == "published")
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .limit(10)
+    )
+    while time.monotonic() < stop:
+        try:
+            async with maker() as session:
+                await session.execute(query)
+            stats["reads"] += 1
+        except OperationalError:
+            stats["read_errors"] += 1
+
+
+async def _run(engine: AsyncEngine, seconds: float, readers: int, writers: int) -> dict[str, int]:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User).values(
+                id="bench",
+                email="bench@example.com",
+                name="bench",
+                provider="bench",
+                provider_id="bench",
+            )
+        )
+
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    stats = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+    stop = time.monotonic() + seconds
+    await asyncio.gather(
+        *(_reader(maker, stop, stats) for _ in range(readers)),
+        *(_writer(maker, stop, stats) for _ in range(writers)),
+    )
+    await engine.dispose()
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = {"default": create_async_engine, "tuned": create_db_engine}
+        for profile, make_engine in profiles.items():
+            engine = make_engine(f"sqlite+aiosqlite:///{tmp}/{profile}.db")
+            stats = await _run(engine, args.seconds, args.readers, args.writers)
+            print(
+                f"{profile:>8}: {stats['reads'] / args.seconds:8.0f} reads/s "
+                f"{stats['writes'] / args.seconds:8.0f} writes/s  "
+                f"errors: {stats['read_errors']} read, {stats['write_errors']} write"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""Benchmark the BeautifulSoup and streaming lxml HTML extractors.
+
+Usage:
+    uv run python scripts/bench_extract.py [--dir content] [--repeat 50]
+
+Every HTML file under --dir is extracted with both engines and the mean time
+per file is printed. Output parity is covered by tests/test_html_extract.py.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.rag.html_extract import EXTRACTORS  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=Path(__file__).resolve().parents[1] / "content")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    files = sorted(args.dir.glob("**/*.html"))
+    if not files:
+        print(f"no HTML files under {args.dir}")
+        return 1
+
+    totals = dict.fromkeys(EXTRACTORS, 0.0)
+    for path in files:
+        timings = {}
+        for name, extract in EXTRACTORS.items():
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                extract(path)
+            timings[name] = (time.perf_counter() - start) / args.repeat
+            totals[name] += timings[name]
+        print(
+            f"{path.relative_to(args.dir)}: {path.stat().st_size / 1024:7.1f} KiB  "
+            + "  ".join(f"{name} {seconds * 1000:7.2f} ms" for name, seconds in timings.items())
+        )
+
+    print(
+        "total: "
+        + "  ".join(f"{name} {seconds * 1000:.2f} ms" for name, seconds in totals.items())
+        + f"  speedup {totals['soup'] / totals['lxml']:.1f}x"
+    )
+    print(f"{len(files)} files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from collections.abc import AsyncIterator
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, insert
+
+# app.core.database 在导入时按配置创建引擎，测试使用临时目录中的数据库
+_DATA_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_DATA_DIR}/app.db")
+os.environ.setdefault("CHROMA_PERSIST_DIR", f"{_DATA_DIR}/chroma")
+os.environ.setdefault("SNAPSHOT_DIR", "")
+
+
+@pytest.fixture
+async def client() -> AsyncIterator[AsyncClient]:
+    """只挂载文章路由的应用，数据库中只有一个作者"""
+    # 在设置好环境变量之后再导入 app
+    from app.api.routes import articles
+    from app.core.database import engine, init_db
+    from app.models import Article, ArticleTag, User
+    from app.services.response_cache import get_article_cache, list_total_cache
+
+    await init_db()
+    async with engine.begin() as conn:
+        await conn.execute(delete(ArticleTag))
+        await conn.execute(delete(Article))
+        await conn.execute(delete(User))
+        await conn.execute(
+            insert(User),
+            {
+                "id": "author",
+                "email": "author@example.com",
+                "name": "Author",
+                "provider": "github",
+                "provider_id": "1",
+            },
+        )
+    get_article_cache().clear()
+    list_total_cache.clear()
+
+    app = FastAPI()
+    app.include_router(articles.router, prefix="/api/articles")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
@@ -0,0 +1,36 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import admin
+from app.core.deps import get_current_user
+from app.models import User
+
+# 这些管理接口要求管理员身份
+ADMIN_ENDPOINTS = [
+    ("POST", "/api/admin/reindex/rollback"),
+    ("GET", "/api/admin/http-pool"),
+    ("GET", "/api/admin/chat-cancellations"),
+    ("GET", "/api/admin/auth-cache"),
+    ("POST", "/api/admin/snapshots"),
+]
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    return app
+
+
+@pytest.mark.parametrize(("method", "path"), ADMIN_ENDPOINTS)
+def test_requires_authentication(app: FastAPI, method: str, path: str) -> None:
+    response = TestClient(app).request(method, path)
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize(("method", "path"), ADMIN_ENDPOINTS)
+def test_requires_admin_role(app: FastAPI, method: str, path: str) -> None:
+    app.dependency_overrides[get_current_user] = lambda: User(id="u1", role="user")
+    response = TestClient(app).request(method, path)
+    assert response.status_code == 403
@@ -0,0 +1,55 @@
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from app.api.routes import admin
+from app.core.database import async_session_maker
+from app.core.deps import get_current_user
+from app.models import Article, User
+
+
+@pytest.fixture
+async def admin_client(client: AsyncClient) -> AsyncIterator[AsyncClient]:
+    """client fixture 准备好数据库后，挂载管理路由并以管理员身份访问"""
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    app.dependency_overrides[get_current_user] = lambda: User(id="author", role="admin")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def _import(client: AsyncClient, mode: str, **fields: object) -> dict:
+    line = {"title": "Title", "slug": "post", "excerpt": "Excerpt", "content": "body", **fields}
+    response = await client.post(
+        "/api/admin/articles/import", params={"mode": mode}, content=json.dumps(line)
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["failed"] == 0, body["errors"]
+    return body
+
+
+async def _published_at() -> datetime | None:
+    async with async_session_maker() as db:
+        return await db.scalar(select(Article.published_at).where(Article.slug == "post"))
+
+
+async def test_upsert_keeps_publish_date_when_line_omits_it(admin_client: AsyncClient) -> None:
+    await _import(admin_client, "insert", status="published", published_at="2024-05-01T08:00:00")
+    body = await _import(admin_client, "upsert", status="published", title="Edited")
+    assert body["updated"] == 1
+    assert await _published_at() == datetime(2024, 5, 1, 8, 0)
+
+
+async def test_upsert_sets_publish_date_when_draft_is_published(
+    admin_client: AsyncClient,
+) -> None:
+    await _import(admin_client, "insert", status="draft")
+    assert await _published_at() is None
+    await _import(admin_client, "upsert", status="published")
+    assert await _published_at() is not None
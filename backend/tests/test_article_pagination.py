@@ -0,0 +1,74 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert, text
+
+from app.core.database import _normalize_sqlite_timestamps, engine
+from app.models import Article
+from app.services.response_cache import list_total_cache
+
+
+async def _insert_articles(count: int, created_at: str | None = None) -> list[str]:
+    """插入已发布文章；指定 created_at 时按原始文本写入（模拟 CURRENT_TIMESTAMP）"""
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(Article),
+            [
+                {
+                    "id": article_id,
+                    "slug": article_id,
+                    "title": "Title",
+                    "excerpt": "",
+                    "content": "",
+                    "status": "published",
+                    "author_id": "author",
+                }
+                for article_id in ids
+            ],
+        )
+        if created_at is not None:
+            await conn.execute(
+                text("UPDATE articles SET created_at = :created_at WHERE id = :id"),
+                [{"created_at": created_at, "id": article_id} for article_id in ids],
+            )
+    return ids
+
+
+async def _walk(client: AsyncClient, page_size: int, max_pages: int = 20) -> list[str]:
+    seen: list[str] = []
+    params: dict[str, str | int] = {"page_size": page_size, "with_total": "false"}
+    for _ in range(max_pages):
+        response = await client.get("/api/articles", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        seen.extend(item["id"] for item in body["items"])
+        if body["next_cursor"] is None:
+            return seen
+        params["cursor"] = body["next_cursor"]
+    raise AssertionError("cursor pagination did not terminate")
+
+
+async def test_cursor_walks_ties_without_gaps_or_repeats(client: AsyncClient) -> None:
+    ids = await _insert_articles(5, created_at="2026-01-01 00:00:00")
+    ids += await _insert_articles(3)
+    async with engine.begin() as conn:
+        await _normalize_sqlite_timestamps(conn)
+
+    seen = await _walk(client, page_size=2)
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+
+
+async def test_invalid_cursor(client: AsyncClient) -> None:
+    response = await client.get("/api/articles", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+async def test_total_cache_is_bounded(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(list_total_cache, "max_size", 2)
+    for tag in ("a", "b", "c"):
+        response = await client.get("/api/articles", params={"tag": tag})
+        assert response.status_code == 200
+    assert list_total_cache.stats()["size"] == 2
@@ -0,0 +1,175 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import chat
+from app.core.deps import get_current_user_optional
+from app.services.admission import AdmissionController
+from app.services.rag.chat_service import get_chat_service
+
+
+class FakeChatService:
+    async def chat(self, message: str, history: list) -> tuple[str, list]:
+        return "pong", []
+
+    async def chat_stream(self, message: str, history: list) -> AsyncIterator[str]:
+        yield 'data: {"type": "content", "content": "pong"}\n\n'
+
+
+@pytest.fixture
+def controller(monkeypatch: pytest.MonkeyPatch) -> AdmissionController:
+    controller = AdmissionController(
+        max_in_flight=1, max_queue=0, queue_timeout=0.1, per_client_concurrency=1
+    )
+    monkeypatch.setattr(chat, "get_admission_controller", lambda: controller)
+    return controller
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    app.dependency_overrides[get_chat_service] = FakeChatService
+    app.dependency_overrides[get_current_user_optional] = lambda: None
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["/api/chat", "/api/chat/stream"])
+def test_permit_released_when_body_is_invalid(
+    client: TestClient, controller: AdmissionController, path: str
+) -> None:
+    for _ in range(3):
+        response = client.post(path, json={"message": ""})
+        assert response.status_code == 422
+    assert controller.in_flight == 0
+
+    response = client.post(path, json={"message": "ping"})
+    assert response.status_code == 200
+    assert controller.in_flight == 0
+
+
+def test_permit_released_after_stream(client: TestClient, controller: AdmissionController) -> None:
+    for _ in range(3):
+        response = client.post("/api/chat/stream", json={"message": "ping"})
+        assert response.status_code == 200
+        assert "pong" in response.text
+    assert controller.in_flight == 0
+    assert controller.rejected == 0
+
+
+class BlockingChatService:
+    """流式回答发送第一帧后保持打开，直到 finish 被设置"""
+
+    def __init__(self) -> None:
+        self.finish = asyncio.Event()
+
+    async def chat_stream(self, message: str, history: list) -> AsyncIterator[str]:
+        yield 'data: {"type": "content", "content": "po"}\n\n'
+        await self.finish.wait()
+        yield 'data: {"type": "content", "content": "ng"}\n\n'
+
+
+class StreamCall:
+    """直接驱动 ASGI 应用，可以在响应体发送过程中观察状态并模拟客户端断开"""
+
+    def __init__(self, app: FastAPI, ip: str) -> None:
+        self.messages: list[dict[str, Any]] = []
+        self.started = asyncio.Event()
+        self.disconnected = asyncio.Event()
+        self._body_sent = False
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/chat/stream",
+            "raw_path": b"/api/chat/stream",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json"), (b"x-real-ip", ip.encode())],
+            "client": (ip, 1234),
+            "server": ("test", 80),
+        }
+        self.task = asyncio.create_task(app(scope, self._receive, self._send))
+
+    async def _receive(self) -> dict[str, Any]:
+        if not self._body_sent:
+            self._body_sent = True
+            body = json.dumps({"message": "ping"}).encode()
+            return {"type": "http.request", "body": body, "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        self.messages.append(message)
+        if message["type"] == "http.response.body" and message.get("body"):
+            self.started.set()
+
+    @property
+    def status(self) -> int:
+        return self.messages[0]["status"]
+
+
+@pytest.fixture
+def streaming_app() -> tuple[FastAPI, BlockingChatService]:
+    service = BlockingChatService()
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    app.dependency_overrides[get_chat_service] = lambda: service
+    app.dependency_overrides[get_current_user_optional] = lambda: None
+    return app, service
+
+
+async def _open_stream(app: FastAPI) -> StreamCall:
+    call = StreamCall(app, "10.0.0.1")
+    await asyncio.wait_for(call.started.wait(), timeout=2)
+    assert call.status == 200
+    return call
+
+
+async def _second_request(app: FastAPI) -> int:
+    call = StreamCall(app, "10.0.0.2")
+    await asyncio.wait_for(call.task, timeout=2)
+    return call.status
+
+
+async def test_permit_held_until_stream_ends(
+    streaming_app: tuple[FastAPI, BlockingChatService], controller: AdmissionController
+) -> None:
+    app, service = streaming_app
+    first = await _open_stream(app)
+    assert controller.in_flight == 1
+    # 第一个流仍在发送，唯一的名额被占用，第二个请求被拒绝
+    assert await _second_request(app) == 503
+
+    service.finish.set()
+    await asyncio.wait_for(first.task, timeout=2)
+    assert controller.in_flight == 0
+    service.finish = asyncio.Event()
+    second = await _open_stream(app)
+    assert controller.in_flight == 1
+    second.disconnected.set()
+    await asyncio.wait_for(second.task, timeout=2)
+
+
+async def test_permit_released_when_client_disconnects(
+    streaming_app: tuple[FastAPI, BlockingChatService], controller: AdmissionController
+) -> None:
+    app, _ = streaming_app
+    first = await _open_stream(app)
+    assert controller.in_flight == 1
+
+    first.disconnected.set()
+    await asyncio.wait_for(first.task, timeout=2)
+    assert controller.in_flight == 0
+    second = await _open_stream(app)
+    assert controller.in_flight == 1
+    second.disconnected.set()
+    await asyncio.wait_for(second.task, timeout=2)
+    assert controller.in_flight == 0
@@ -0,0 +1,38 @@
+from typing import Any
+
+import pytest
+
+from app.core import http
+from app.services.rag import chat_service
+from app.services.rag.chat_service import ChatService
+
+
+class FakeSDKClient:
+    """记录构造参数，代替 SDK 客户端"""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.http_client = kwargs["http_client"]
+
+
+@pytest.fixture
+def service(monkeypatch: pytest.MonkeyPatch) -> ChatService:
+    monkeypatch.setattr(chat_service, "get_vector_store", lambda: None)
+    monkeypatch.setattr(chat_service, "AsyncOpenAI", FakeSDKClient)
+    monkeypatch.setattr(chat_service, "AsyncAnthropic", FakeSDKClient)
+    return ChatService()
+
+
+async def test_sdk_clients_follow_shared_http_client(service: ChatService) -> None:
+    openai_client = service.openai_client
+    anthropic_client = service.anthropic_client
+    assert service.openai_client is openai_client
+    assert openai_client.http_client is http.get_http_client()
+
+    # lifespan 重启：旧的共享客户端被关闭，之后创建新的
+    await http.close_http_client()
+    shared = http.get_http_client()
+    assert service.openai_client is not openai_client
+    assert service.openai_client.http_client is shared
+    assert service.anthropic_client is not anthropic_client
+    assert service.anthropic_client.http_client is shared
+    await http.close_http_client()
@@ -0,0 +1,24 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+from app.services.rag.dedup import NearDuplicateIndex
+
+
+@pytest.mark.parametrize("distance", [-1, 64])
+def test_distance_out_of_range(distance: int) -> None:
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(distance)
+    with pytest.raises(ValidationError):
+        Settings(index_near_duplicate_distance=distance)
+
+
+@pytest.mark.parametrize("distance", [0, 3, 63])
+def test_seen_finds_repeated_text(distance: int) -> None:
+    index = NearDuplicateIndex(distance)
+    assert not index.seen("the quick brown fox jumps over the lazy dog")
+    assert index.seen("The quick  brown fox jumps over the lazy dog")
+
+
+def test_dedup_is_opt_in() -> None:
+    assert Settings(_env_file=None).index_dedup is False
@@ -0,0 +1,172 @@
+import asyncio
+import types
+from collections.abc import AsyncGenerator, Callable
+
+import pytest
+
+from app.services.rag import failover
+from app.services.rag.failover import (
+    AllProvidersFailedError,
+    Candidate,
+    CircuitBreaker,
+    hedged_stream,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    # 只替换 failover 模块看到的时钟，事件循环仍使用真实的 time.monotonic
+    monkeypatch.setattr(failover, "time", types.SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def _tripped(clock: FakeClock) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half-open"
+    return breaker
+
+
+def _stub(chunks: list[str], delay: float = 0.0, error: Exception | None = None):
+    """模拟一个 LLM 后端：delay 秒后输出首个片段，或者抛出 error"""
+
+    def factory() -> AsyncGenerator[str, None]:
+        async def stream() -> AsyncGenerator[str, None]:
+            await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            for chunk in chunks:
+                yield chunk
+
+        return stream()
+
+    return factory
+
+
+def _candidate(
+    name: str, factory: Callable[[], AsyncGenerator[str, None]], breaker: CircuitBreaker | None
+) -> Candidate:
+    return Candidate(name=name, breaker=breaker or CircuitBreaker(), factory=factory)
+
+
+async def _collect(stream: AsyncGenerator[str, None]) -> list[str]:
+    return [chunk async for chunk in stream]
+
+
+def test_half_open_admits_one_probe(clock: FakeClock) -> None:
+    breaker = _tripped(clock)
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.probing
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(clock: FakeClock) -> None:
+    breaker = _tripped(clock)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_lost_probe_expires(clock: FakeClock) -> None:
+    breaker = _tripped(clock)
+    assert breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+async def test_fails_over_before_first_token() -> None:
+    primary = CircuitBreaker(failure_threshold=1)
+    candidates = [
+        _candidate("primary", _stub([], error=RuntimeError("down")), primary),
+        _candidate("backup", _stub(["a", "b"]), None),
+    ]
+    assert await _collect(hedged_stream(candidates)) == ["a", "b"]
+    assert primary.state == "open"
+
+
+async def test_hedge_uses_first_responder() -> None:
+    candidates = [
+        _candidate("slow", _stub(["slow"], delay=1.0), None),
+        _candidate("fast", _stub(["fast"]), None),
+    ]
+    assert await _collect(hedged_stream(candidates, hedge_delay=0.05)) == ["fast"]
+
+
+async def test_concurrent_calls_share_one_probe(clock: FakeClock) -> None:
+    breaker = _tripped(clock)
+    started = 0
+    release = asyncio.Event()
+
+    def factory() -> AsyncGenerator[str, None]:
+        async def stream() -> AsyncGenerator[str, None]:
+            nonlocal started
+            started += 1
+            await release.wait()
+            yield "ok"
+
+        return stream()
+
+    candidates = [_candidate("only", factory, breaker)]
+    probe = asyncio.create_task(_collect(hedged_stream(candidates)))
+    await asyncio.sleep(0.01)
+    with pytest.raises(AllProvidersFailedError):
+        await _collect(hedged_stream(candidates))
+
+    release.set()
+    assert await probe == ["ok"]
+    assert started == 1
+    assert breaker.state == "closed"
+
+
+async def test_cancelled_probe_releases_breaker(clock: FakeClock) -> None:
+    breaker = _tripped(clock)
+    candidates = [_candidate("only", _stub(["late"], delay=10), breaker)]
+    probe = asyncio.create_task(_collect(hedged_stream(candidates)))
+    await asyncio.sleep(0.01)
+    assert breaker.probing
+
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert not breaker.probing
+    assert breaker.allow()
+
+
+async def test_open_circuit_fails_fast(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 10
+    calls = 0
+
+    def factory() -> AsyncGenerator[str, None]:
+        nonlocal calls
+        calls += 1
+        return _stub(["never"])()
+
+    with pytest.raises(AllProvidersFailedError):
+        await _collect(hedged_stream([_candidate("only", factory, breaker)]))
+    assert calls == 0
+
+    # 冷却期结束后放行一次试探
+    clock.now += 20
+    assert await _collect(hedged_stream([_candidate("only", factory, breaker)])) == ["never"]
+    assert calls == 1
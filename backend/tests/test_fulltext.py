@@ -0,0 +1,75 @@
+from collections.abc import AsyncIterator
+
+import pytest
+from sqlalchemy import delete, insert, text
+
+from app.core.database import async_session_maker, engine, init_db
+from app.models import Article, ArticleTag, User
+from app.services.fulltext import search_articles
+
+
+@pytest.fixture
+async def seeded() -> AsyncIterator[None]:
+    await init_db()
+    async with engine.begin() as conn:
+        await conn.execute(delete(ArticleTag))
+        await conn.execute(delete(Article))
+        await conn.execute(delete(User))
+        await conn.execute(
+            insert(User),
+            {
+                "id": "author",
+                "email": "author@example.com",
+                "name": "Author",
+                "provider": "github",
+                "provider_id": "1",
+            },
+        )
+    yield
+
+
+async def _insert(article_id: str, title: str, content: str = "") -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(Article),
+            {
+                "id": article_id,
+                "slug": article_id,
+                "title": title,
+                "excerpt": "",
+                "content": content,
+                "status": "published",
+                "author_id": "author",
+            },
+        )
+
+
+async def _search(query: str) -> list[dict]:
+    async with async_session_maker() as db:
+        return await search_articles(db, query)
+
+
+async def test_highlight_escapes_article_html(seeded: None) -> None:
+    await _insert("a", "<b>bold</b> needle", content="<script>alert(1)</script> needle")
+    [row] = await _search("needle")
+    assert row["title_highlight"] == "&lt;b&gt;bold&lt;/b&gt; <mark>needle</mark>"
+    assert "<script>" not in row["snippet"]
+    assert "<mark>needle</mark>" in row["snippet"]
+
+
+async def test_short_term_fallback_escapes_title(seeded: None) -> None:
+    await _insert("a", "<i>go</i>")
+    [row] = await _search("go")
+    assert row["title_highlight"] == "&lt;i&gt;go&lt;/i&gt;"
+
+
+async def test_startup_rebuild_follows_renumbered_rowids(seeded: None) -> None:
+    for article_id in ("second", "third"):
+        await _insert(article_id, f"{article_id} article")
+    # 模拟 VACUUM 或导出/恢复后 rowid 重新编号：不会触发同步触发器
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE articles SET rowid = 1000 - rowid"))
+
+    await init_db()
+    assert [row["id"] for row in await _search("third")] == ["third"]
+    assert [row["id"] for row in await _search("second")] == ["second"]
@@ -0,0 +1,93 @@
+from app.schemas.chat import ChatMessage
+from app.services.rag.history import HistoryManager, estimate_tokens
+
+
+# 36 个 ASCII 字符 = 9 token，加上每条消息 4 token 的开销，每条消息 13 token
+def _content(i: int) -> str:
+    return f"{i:04d}" + "x" * 32
+
+
+class RecordingSummarizer:
+    def __init__(self, fail: bool = False) -> None:
+        self.calls: list[tuple[str | None, list[dict]]] = []
+        self.fail = fail
+
+    async def __call__(self, previous: str | None, messages: list[dict]) -> str:
+        self.calls.append((previous, messages))
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        return f"summary-{len(self.calls)}"
+
+
+def _history(turns: int) -> list[ChatMessage]:
+    messages = []
+    for i in range(turns):
+        messages.append(ChatMessage(role="user", content=_content(i)))
+        messages.append(ChatMessage(role="assistant", content=_content(i)))
+    return messages
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("你好世界") == 4
+
+
+async def test_short_history_is_kept_verbatim() -> None:
+    summarizer = RecordingSummarizer()
+    manager = HistoryManager(summarizer, max_tokens=100)
+    history = _history(2)
+
+    recent, summary = await manager.prepare(history)
+    assert recent == [{"role": m.role, "content": m.content} for m in history]
+    assert summary is None
+    assert summarizer.calls == []
+
+
+async def test_older_turns_are_summarized() -> None:
+    summarizer = RecordingSummarizer()
+    manager = HistoryManager(summarizer, max_tokens=30)
+    history = _history(3)
+
+    recent, summary = await manager.prepare(history)
+    # 预算内只能放下最后两条（26 token），且必须从用户消息开始
+    assert recent == [{"role": m.role, "content": m.content} for m in history[4:]]
+    assert summary == "summary-1"
+    assert summarizer.calls == [
+        (None, [{"role": m.role, "content": m.content} for m in history[:4]])
+    ]
+
+
+async def test_kept_messages_start_with_user_turn() -> None:
+    manager = HistoryManager(RecordingSummarizer(), max_tokens=40)
+    recent, _ = await manager.prepare(_history(3))
+    # 三条消息放得下，但第一条是助手消息，被并入摘要
+    assert [m["role"] for m in recent] == ["user", "assistant"]
+
+
+async def test_summary_cache_is_reused_across_turns() -> None:
+    summarizer = RecordingSummarizer()
+    manager = HistoryManager(summarizer, max_tokens=30)
+    history = _history(4)
+
+    await manager.prepare(history[:6])
+    recent, summary = await manager.prepare(history)
+    assert recent == [{"role": m.role, "content": m.content} for m in history[6:]]
+    assert summary == "summary-2"
+    # 第二轮只把新移出窗口的两条消息合并进上一次的摘要
+    assert summarizer.calls[1] == (
+        "summary-1",
+        [{"role": m.role, "content": m.content} for m in history[4:6]],
+    )
+
+    # 相同的历史直接命中缓存
+    assert (await manager.prepare(history))[1] == "summary-2"
+    assert len(summarizer.calls) == 2
+
+
+async def test_summary_failure_keeps_recent_messages() -> None:
+    manager = HistoryManager(RecordingSummarizer(fail=True), max_tokens=30)
+    history = _history(3)
+
+    recent, summary = await manager.prepare(history)
+    assert recent == [{"role": m.role, "content": m.content} for m in history[4:]]
+    assert summary is None
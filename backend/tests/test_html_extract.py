@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.rag.html_extract import READ_CHUNK_SIZE, extract_soup, extract_streaming
+
+CONTENT_DIR = Path(__file__).resolve().parents[1] / "content"
+
+CASES = {
+    "comment": "<html><body><p>alpha<!-- c -->beta</p></body></html>",
+    "processing_instruction": "<html><body><p>alpha<?php echo 1 ?>beta</p></body></html>",
+    "template": "<html><body><p>x</p><template><p>hidden</p></template><p>y</p></body></html>",
+    "h1_in_template": "<html><body><template><h1>hidden</h1></template><h1>T</h1></body></html>",
+    "h1_with_comment": "<html><body><h1>A<!-- c -->B</h1><p>text</p></body></html>",
+    "title_wins": "<html><head><title> Page </title></head><body><h1>H</h1>body</body></html>",
+    "boilerplate": (
+        "<html><body><header>top</header><nav>menu</nav><main>"
+        "<script>var a = 1;</script><style>p {}</style><p>kept</p>"
+        "</main><footer>bottom</footer></body></html>"
+    ),
+    "main_over_article": (
+        "<html><body><article>outer</article><main><p>inner</p></main></body></html>"
+    ),
+    "no_body": "<p>fragment</p>",
+    "empty": "",
+    "whitespace_only": " \n\t\n ",
+}
+
+
+@pytest.mark.parametrize("html", CASES.values(), ids=CASES.keys())
+def test_streaming_matches_soup(tmp_path: Path, html: str) -> None:
+    path = tmp_path / "page.html"
+    path.write_text(html, encoding="utf-8")
+    assert extract_streaming(path) == extract_soup(path)
+
+
+def test_streaming_matches_soup_across_chunks(tmp_path: Path) -> None:
+    paragraphs = "".join(f"<p>段落 {i}<!-- {i} --></p>" for i in range(READ_CHUNK_SIZE // 10))
+    path = tmp_path / "large.html"
+    path.write_text(f"<html><body><main>{paragraphs}</main></body></html>", encoding="utf-8")
+    assert extract_streaming(path) == extract_soup(path)
+
+
+@pytest.mark.parametrize("path", sorted(CONTENT_DIR.glob("**/*.html")), ids=lambda p: p.name)
+def test_streaming_matches_soup_on_content(path: Path) -> None:
+    assert extract_streaming(path) == extract_soup(path)
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert, select
+
+from app.core.database import async_session_maker, engine, init_db
+from app.core.query_stats import QueryBudgetExceeded, normalize_sql, query_budget
+from app.models import Article
+
+
+def test_normalize_sql_folds_literals_and_in_lists() -> None:
+    first = normalize_sql("SELECT * FROM t WHERE id IN (?, ?) AND name = 'a' LIMIT 10")
+    second = normalize_sql("SELECT *  FROM t WHERE id IN (?, ?, ?) AND name = 'b''c' LIMIT 20")
+    assert first == second == "SELECT * FROM t WHERE id IN (?...) AND name = ? LIMIT ?"
+
+
+async def test_budget_counts_statements() -> None:
+    await init_db()
+    async with async_session_maker() as db:
+        with query_budget(max_queries=2) as stats:
+            await db.execute(select(Article.id).limit(1))
+            await db.execute(select(Article.slug).limit(1))
+    assert stats.count == 2
+
+
+async def test_budget_raises_over_limit() -> None:
+    await init_db()
+    async with async_session_maker() as db:
+        with pytest.raises(QueryBudgetExceeded), query_budget(max_queries=1):
+            await db.execute(select(Article.id).limit(1))
+            await db.execute(select(Article.slug).limit(1))
+
+
+async def test_repeated_statement_is_reported_as_n_plus_one() -> None:
+    await init_db()
+    async with async_session_maker() as db:
+        with pytest.raises(QueryBudgetExceeded, match="N\\+1"), query_budget(max_repeats=2):
+            for article_id in ("a", "b", "c"):
+                await db.execute(select(Article).where(Article.id == article_id))
+
+
+async def test_statements_after_block_are_not_counted() -> None:
+    await init_db()
+    async with async_session_maker() as db:
+        with query_budget() as stats:
+            await db.execute(select(Article.id).limit(1))
+        await db.execute(select(Article.id).limit(1))
+    assert stats.count == 1
+
+
+async def test_article_list_has_no_n_plus_one(client: AsyncClient) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(Article),
+            [
+                {
+                    "id": f"id-{i}",
+                    "slug": f"slug-{i}",
+                    "title": "Title",
+                    "excerpt": "",
+                    "content": "",
+                    "tags": json.dumps(["python", "sqlite"]),
+                    "status": "published",
+                    "author_id": "author",
+                }
+                for i in range(5)
+            ],
+        )
+    with query_budget(max_queries=3, max_repeats=1) as stats:
+        response = await client.get("/api/articles", params={"page_size": 5})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 5
+    assert stats.count <= 3
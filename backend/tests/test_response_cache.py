@@ -0,0 +1,55 @@
+import pytest
+
+from app.services import response_cache
+from app.services.response_cache import CachedResponse, ResponseCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    return clock
+
+
+def _response(body: bytes) -> CachedResponse:
+    return CachedResponse(body=body, etag=f'"{body.decode()}"')
+
+
+def test_entries_expire_after_ttl(clock: FakeClock) -> None:
+    cache = ResponseCache(ttl=30)
+    cache.set("/a", _response(b"v1"), cache.generation)
+    clock.now += 29
+    assert cache.get("/a") == _response(b"v1")
+
+    clock.now += 1
+    assert cache.get("/a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_no_refill_during_replica_lag(clock: FakeClock) -> None:
+    cache = ResponseCache(ttl=30, fill_delay=5)
+    cache.clear()
+
+    clock.now += 4
+    cache.set("/a", _response(b"stale"), cache.generation)
+    assert cache.get("/a") is None
+
+    clock.now += 1
+    cache.set("/a", _response(b"fresh"), cache.generation)
+    assert cache.get("/a") == _response(b"fresh")
+
+
+def test_set_after_concurrent_clear_is_dropped(clock: FakeClock) -> None:
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.clear()
+    cache.set("/a", _response(b"stale"), generation)
+    assert cache.get("/a") is None
@@ -0,0 +1,163 @@
+import asyncio
+from collections.abc import AsyncGenerator
+
+import pytest
+
+from app.services.singleflight import SingleFlight, StreamSingleFlight, make_key
+
+
+def test_make_key_ignores_dict_order() -> None:
+    assert make_key({"a": 1, "b": 2}) == make_key({"b": 2, "a": 1})
+    assert make_key("q", 5) != make_key("q", 6)
+
+
+async def test_concurrent_callers_share_one_call() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def fn() -> int:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return 42
+
+    waiters = [asyncio.create_task(flight.do("k", fn)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert len(flight) == 1
+    release.set()
+    assert await asyncio.gather(*waiters) == [42] * 5
+    assert calls == 1
+    assert len(flight) == 0
+
+
+async def test_error_reaches_every_waiter() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    release = asyncio.Event()
+
+    async def fn() -> int:
+        await release.wait()
+        raise ValueError("boom")
+
+    waiters = [asyncio.create_task(flight.do("k", fn)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+
+
+async def test_call_after_completion_runs_again() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    calls = 0
+
+    async def fn() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("k", fn) == 1
+    assert await flight.do("k", fn) == 2
+
+
+async def test_cancelled_caller_does_not_cancel_others() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+    release = asyncio.Event()
+
+    async def fn() -> int:
+        await release.wait()
+        return 1
+
+    first = asyncio.create_task(flight.do("k", fn))
+    second = asyncio.create_task(flight.do("k", fn))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == 1
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+class Source:
+    """可控的上游流：按 push 的顺序产出片段，记录是否被取消"""
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[str | BaseException | None] = asyncio.Queue()
+        self.started = 0
+        self.cancelled = False
+
+    def factory(self) -> AsyncGenerator[str, None]:
+        async def stream() -> AsyncGenerator[str, None]:
+            self.started += 1
+            try:
+                while (item := await self.queue.get()) is not None:
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+
+        return stream()
+
+
+async def _collect(stream: AsyncGenerator[str, None]) -> list[str]:
+    return [item async for item in stream]
+
+
+async def test_stream_subscribers_share_one_upstream() -> None:
+    flight: StreamSingleFlight[str] = StreamSingleFlight()
+    source = Source()
+    first = asyncio.create_task(_collect(flight.stream("k", source.factory)))
+    source.queue.put_nowait("a")
+    await asyncio.sleep(0.01)
+    # 后加入的订阅者从头开始接收
+    second = asyncio.create_task(_collect(flight.stream("k", source.factory)))
+    source.queue.put_nowait("b")
+    source.queue.put_nowait(None)
+    assert await first == ["a", "b"]
+    assert await second == ["a", "b"]
+    assert source.started == 1
+
+
+async def test_stream_error_reaches_every_subscriber() -> None:
+    flight: StreamSingleFlight[str] = StreamSingleFlight()
+    source = Source()
+    subscribers = [asyncio.create_task(_collect(flight.stream("k", source.factory)))]
+    subscribers.append(asyncio.create_task(_collect(flight.stream("k", source.factory))))
+    source.queue.put_nowait("a")
+    source.queue.put_nowait(RuntimeError("upstream"))
+    results = await asyncio.gather(*subscribers, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_last_subscriber_leaving_cancels_upstream() -> None:
+    flight: StreamSingleFlight[str] = StreamSingleFlight()
+    source = Source()
+    first = flight.stream("k", source.factory)
+    second = flight.stream("k", source.factory)
+    source.queue.put_nowait("a")
+    assert await anext(first) == "a"
+    assert await anext(second) == "a"
+
+    await first.aclose()
+    await asyncio.sleep(0.01)
+    assert not source.cancelled
+
+    await second.aclose()
+    await asyncio.sleep(0.01)
+    assert source.cancelled
+    assert len(flight) == 0
+
+
+async def test_late_joiner_after_completion_starts_fresh_stream() -> None:
+    flight: StreamSingleFlight[str] = StreamSingleFlight()
+    source = Source()
+    source.queue.put_nowait("a")
+    source.queue.put_nowait(None)
+    assert await _collect(flight.stream("k", source.factory)) == ["a"]
+
+    source.queue.put_nowait("b")
+    source.queue.put_nowait(None)
+    assert await _collect(flight.stream("k", source.factory)) == ["b"]
+    assert source.started == 2
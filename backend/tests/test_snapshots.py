@@ -0,0 +1,71 @@
+import asyncio
+import fcntl
+import json
+from pathlib import Path
+
+from sqlalchemy import delete, insert
+
+from app.core.database import engine, init_db
+from app.models import Article, ArticleTag, User
+from app.services.articles import decode_cursor
+from app.services.snapshots import LOCK_FILE, SnapshotPublisher
+
+
+async def _seed(count: int) -> None:
+    await init_db()
+    async with engine.begin() as conn:
+        await conn.execute(delete(ArticleTag))
+        await conn.execute(delete(Article))
+        await conn.execute(delete(User))
+        await conn.execute(
+            insert(User),
+            {
+                "id": "author",
+                "email": "author@example.com",
+                "name": "Author",
+                "provider": "github",
+                "provider_id": "1",
+            },
+        )
+        await conn.execute(
+            insert(Article),
+            [
+                {
+                    "id": f"id-{i}",
+                    "slug": f"slug-{i}",
+                    "title": "Title",
+                    "excerpt": "",
+                    "content": "",
+                    "status": "published",
+                    "author_id": "author",
+                }
+                for i in range(count)
+            ],
+        )
+
+
+async def test_publish_writes_pages_with_cursors(tmp_path: Path) -> None:
+    await _seed(3)
+    publisher = SnapshotPublisher(tmp_path, page_size=2)
+    result = await publisher.publish()
+
+    current = tmp_path / "current"
+    assert current.resolve().name == result.version
+    assert (current / "articles" / "slug-0.json").exists()
+    first = json.loads((current / "lists" / "_all" / "_all" / "page-1.json").read_bytes())
+    assert first["total"] == 3
+    created_at, article_id = decode_cursor(first["next_cursor"])
+    assert article_id == first["items"][-1]["id"]
+
+
+async def test_publish_waits_for_other_process(tmp_path: Path) -> None:
+    await _seed(1)
+    publisher = SnapshotPublisher(tmp_path)
+    with (tmp_path / LOCK_FILE).open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        task = asyncio.create_task(publisher.publish())
+        await asyncio.sleep(0.3)
+        assert not task.done()
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    result = await asyncio.wait_for(task, timeout=5)
+    assert (tmp_path / result.version).is_dir()
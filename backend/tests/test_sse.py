@@ -0,0 +1,99 @@
+import asyncio
+from collections.abc import AsyncGenerator
+
+from app.services.sse import HEARTBEAT_FRAME, coalesce, until_disconnected, with_heartbeat
+
+
+async def _source(*items: str | float) -> AsyncGenerator[str, None]:
+    """按顺序产出字符串；数字表示先等待这么多秒"""
+    for item in items:
+        if isinstance(item, float):
+            await asyncio.sleep(item)
+        else:
+            yield item
+
+
+async def _collect(stream: AsyncGenerator[str, None]) -> list[str]:
+    return [item async for item in stream]
+
+
+async def test_coalesce_flushes_at_size_limit() -> None:
+    chunks = ["x" * 100] * 7
+    frames = await _collect(coalesce(_source(*chunks), max_delay=10, max_bytes=250))
+    assert frames == ["x" * 300, "x" * 300, "x" * 100]
+
+
+async def test_coalesce_flushes_after_delay() -> None:
+    frames = await _collect(
+        coalesce(_source("a", "b", 0.2, "c", "d"), max_delay=0.05, max_bytes=1024)
+    )
+    assert frames == ["ab", "cd"]
+
+
+async def test_coalesce_counts_utf8_bytes() -> None:
+    # 每个汉字 3 字节
+    frames = await _collect(coalesce(_source("你", "好", "世"), max_delay=10, max_bytes=6))
+    assert frames == ["你好", "世"]
+
+
+async def test_heartbeat_while_upstream_idle() -> None:
+    frames = await _collect(with_heartbeat(_source("a", 0.25, "b"), interval=0.1))
+    assert frames[0] == "a"
+    assert frames[-1] == "b"
+    assert frames[1:-1] and set(frames[1:-1]) == {HEARTBEAT_FRAME}
+
+
+async def test_no_heartbeat_while_upstream_is_busy() -> None:
+    frames = await _collect(with_heartbeat(_source("a", 0.01, "b", 0.01, "c"), interval=0.2))
+    assert frames == ["a", "b", "c"]
+
+
+async def test_heartbeat_stops_when_stream_closes() -> None:
+    closed = asyncio.Event()
+
+    async def idle() -> AsyncGenerator[str, None]:
+        try:
+            yield "a"
+            await asyncio.sleep(10)
+            yield "never"
+        finally:
+            closed.set()
+
+    stream = with_heartbeat(idle(), interval=0.05)
+    assert await anext(stream) == "a"
+    assert await anext(stream) == HEARTBEAT_FRAME
+    await stream.aclose()
+    assert closed.is_set()
+
+
+async def test_disconnect_stops_generation() -> None:
+    messages: asyncio.Queue[dict] = asyncio.Queue()
+    generated: list[int] = []
+    closed = asyncio.Event()
+    disconnects = 0
+
+    async def generation() -> AsyncGenerator[str, None]:
+        try:
+            for i in range(1000):
+                generated.append(i)
+                yield f"token {i}"
+                await asyncio.sleep(0.01)
+        finally:
+            closed.set()
+
+    def on_disconnect() -> None:
+        nonlocal disconnects
+        disconnects += 1
+
+    stream = until_disconnected(generation(), messages.get, on_disconnect)
+    assert await anext(stream) == "token 0"
+    assert await anext(stream) == "token 1"
+
+    messages.put_nowait({"type": "http.disconnect"})
+    rest = await asyncio.wait_for(_collect(stream), timeout=1)
+    assert rest == []
+    assert closed.is_set()
+    assert disconnects == 1
+    count = len(generated)
+    await asyncio.sleep(0.05)
+    assert len(generated) == count
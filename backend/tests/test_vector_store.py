@@ -0,0 +1,147 @@
+import asyncio
+import fcntl
+import hashlib
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.routes import admin, search
+from app.services.rag import vector_store
+from app.services.rag.embeddings import EmbeddingService
+from app.services.rag.vector_store import VectorStore
+
+
+class HashEmbeddingService(EmbeddingService):
+    """确定性的假向量：相同文本得到相同向量"""
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, query: str) -> list[float]:
+        digest = hashlib.sha256(query.encode()).digest()
+        return [byte / 255 + 0.01 for byte in digest[:16]]
+
+
+@pytest.fixture
+def store(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> VectorStore:
+    monkeypatch.setattr(vector_store, "get_embedding_service", HashEmbeddingService)
+    return VectorStore(str(tmp_path / "chroma"), coalesce=False, reload_interval=0)
+
+
+def _build(store: VectorStore, documents: list[str]) -> str:
+    name = store.create_version()
+    store.add_documents(
+        documents,
+        [{"url": f"/page-{i}", "title": ""} for i in range(len(documents))],
+        [f"doc-{i}" for i in range(len(documents))],
+        collection_name=name,
+    )
+    return name
+
+
+def test_validate_accepts_identical_chunks(store: VectorStore) -> None:
+    for _ in range(10):
+        name = _build(store, ["same chunk", "same chunk", "other chunk"])
+        store.validate_version(name, expected_count=3)
+        store.activate_version(name)
+    assert store.count() == 3
+
+
+def test_validate_rejects_wrong_count(store: VectorStore) -> None:
+    name = _build(store, ["a", "b"])
+    with pytest.raises(vector_store.IndexValidationError):
+        store.validate_version(name, expected_count=3)
+
+
+def test_activate_and_rollback(store: VectorStore) -> None:
+    first = _build(store, ["first"])
+    store.activate_version(first)
+    second = _build(store, ["second", "third"])
+    store.activate_version(second)
+    assert store.count() == 2
+
+    assert store.rollback() == first
+    assert store.count() == 1
+
+
+def _bump_version_elsewhere(store: VectorStore) -> None:
+    """模拟其他 worker 写入：只修改磁盘上的版本号"""
+    state = store._read_state()
+    state.version += 1
+    store._write_state(state)
+
+
+def test_reload_stops_previous_system(store: VectorStore) -> None:
+    store.add_documents(["hello"], [{"url": "/a"}], ["doc-0"])
+    old_system = store._system
+
+    _bump_version_elsewhere(store)
+    assert store.count() == 1
+    assert store._system is not old_system
+    assert not old_system._running
+
+
+def test_reload_waits_for_running_queries(store: VectorStore) -> None:
+    store.add_documents(["hello"], [{"url": "/a"}], ["doc-0"])
+    old_system = store._system
+
+    with store._reading() as (_, collection):
+        _bump_version_elsewhere(store)
+        assert store.count() == 1
+        # 旧 System 仍被查询占用，不能停止
+        assert old_system._running
+        assert collection.count() == 1
+    assert not old_system._running
+
+
+def test_reload_waits_for_writer_lock(store: VectorStore) -> None:
+    _bump_version_elsewhere(store)
+    done = threading.Event()
+    with (store.persist_dir / vector_store.LOCK_FILE).open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        thread = threading.Thread(target=lambda: (store.count(), done.set()))
+        thread.start()
+        assert not done.wait(0.3)
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    thread.join(timeout=5)
+    assert done.is_set()
+
+
+async def test_search_served_during_reindex(
+    store: VectorStore, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store.add_documents(["hello world"], [{"url": "/a", "title": "A"}], ["doc-0"])
+    started = threading.Event()
+    release = threading.Event()
+
+    class BlockingIndexer:
+        def reindex_all(self, directory: Path, base_url: str = "") -> dict[str, int]:
+            started.set()
+            # 只有搜索在重建期间完成才会放行；事件循环被阻塞时这里会超时
+            finished = release.wait(timeout=5)
+            return {
+                "files": int(finished),
+                "chunks": 0,
+                "duplicate_chunks": 0,
+                "boilerplate_lines": 0,
+            }
+
+    monkeypatch.setattr(admin, "ContentIndexer", BlockingIndexer)
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    app.include_router(search.router, prefix="/api/search")
+    app.dependency_overrides[vector_store.get_vector_store] = lambda: store
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        reindex = asyncio.create_task(
+            client.post("/api/admin/reindex", json={"directory": str(tmp_path)})
+        )
+        assert await asyncio.to_thread(started.wait, 5)
+        response = await client.post("/api/search", json={"query": "hello"})
+        assert response.status_code == 200
+        assert response.json()["results"][0]["url"] == "/a"
+        release.set()
+        assert (await reindex).json()["files"] == 1
@@ -64,11 +64,28 @@ export interface Article {
   published_at: string | null
 }
 
+// List items omit the article body; fetch it with articlesApi.get
+export interface ArticleBrief {
+  id: string
+  slug: string
+  title: string
+  excerpt: string
+  category: string
+  tags: string[]
+  status: 'draft' | 'published'
+  read_time: number
+  gradient: string
+  author_name: string
+  created_at: string
+  published_at: string | null
+}
+
 export interface ArticleListResponse {
-  items: Article[]
-  total: number
+  items: ArticleBrief[]
+  total: number | null
   page: number
   page_size: number
+  next_cursor: string | null
 }
 
 export interface ArticleCreate {
@@ -106,6 +123,8 @@ export const articlesApi = {
   list(params: {
     page?: number
     page_size?: number
+    cursor?: string
+    with_total?: boolean
     category?: string
     tag?: string
     status?: string
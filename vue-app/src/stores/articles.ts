@@ -1,10 +1,33 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
-import { articlesApi, type Article, type ArticleCreate, type ArticleUpdate } from '@/api'
+import {
+  articlesApi,
+  type Article,
+  type ArticleBrief,
+  type ArticleCreate,
+  type ArticleUpdate,
+} from '@/api'
 import { useAuthStore } from './auth'
 
+function toBrief(article: Article): ArticleBrief {
+  return {
+    id: article.id,
+    slug: article.slug,
+    title: article.title,
+    excerpt: article.excerpt,
+    category: article.category,
+    tags: article.tags,
+    status: article.status,
+    read_time: article.read_time,
+    gradient: article.gradient,
+    author_name: article.author.name,
+    created_at: article.created_at,
+    published_at: article.published_at,
+  }
+}
+
 export const useArticlesStore = defineStore('articles', () => {
-  const articles = ref<Article[]>([])
+  const articles = ref<ArticleBrief[]>([])
   const currentArticle = ref<Article | null>(null)
   const total = ref(0)
   const page = ref(1)
@@ -34,7 +57,7 @@ export const useArticlesStore = defineStore('articles', () => {
       })
 
       articles.value = result.items
-      total.value = result.total
+      total.value = result.total ?? total.value
       page.value = result.page
     } catch (e) {
       error.value = e instanceof Error ? e.message : 'Failed to fetch articles'
@@ -69,7 +92,7 @@ export const useArticlesStore = defineStore('articles', () => {
 
     try {
       const article = await articlesApi.create(data, authStore.token)
-      articles.value.unshift(article)
+      articles.value.unshift(toBrief(article))
       return article
     } catch (e) {
       error.value = e instanceof Error ? e.message : 'Failed to create article'
@@ -93,7 +116,7 @@ export const useArticlesStore = defineStore('articles', () => {
       // Update in list
       const index = articles.value.findIndex(a => a.id === id)
       if (index !== -1) {
-        articles.value[index] = article
+        articles.value[index] = toBrief(article)
       }
 
       // Update current if same
@@ -14,10 +14,12 @@ export interface Article {
   slug: string
   title: string
   excerpt: string
-  content: string
+  // Omitted in list responses
+  content?: string
   category: 'ai-news' | 'agents' | 'tutorial' | 'tools' | string
   tags: string[]
-  author: User | string
+  author?: User | string
+  author_name?: string
   // Support both old format (date/readTime) and new API format (created_at/read_time)
   date?: string
   readTime?: number